@@ -0,0 +1,81 @@
+"""Фоновое выполнение расчётов и построения сеток.
+
+Функции выполняются в пуле потоков, а результат доставляется в поток GUI
+через очередь сигналов Qt. Задачи объединяются в каналы: новая задача
+канала отменяет предыдущую, и её результат уже не попадёт в интерфейс.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from PySide6.QtCore import QObject, Signal
+
+
+class Cancelled(Exception):
+    """Задача отменена более новой задачей того же канала"""
+
+
+class Token:
+    """Признак отмены задачи; проверяется между этапами расчёта"""
+
+    def __init__(self):
+        self.cancelled = False
+        self.future = None
+
+    def cancel(self):
+        self.cancelled = True
+        if self.future is not None:
+            self.future.cancel()
+
+    def check(self):
+        if self.cancelled:
+            raise Cancelled()
+
+
+class BackgroundRunner(QObject):
+    """Запуск функций в пуле потоков с доставкой результата в поток GUI"""
+    done = Signal(object)
+
+    def __init__(self, workers=None, parent=None):
+        super().__init__(parent)
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.tokens = {}
+        # сигнал испускается из потока пула, поэтому слот выполняется в потоке GUI
+        self.done.connect(self.deliver)
+
+    def submit(self, channel, func, on_result, on_error=None):
+        """Запуск func(token) в пуле; предыдущая задача канала channel отменяется"""
+        self.cancel(channel)
+        token = Token()
+        self.tokens[channel] = token
+        token.future = self.executor.submit(self.run, token, func, on_result, on_error)
+        return token
+
+    def cancel(self, channel):
+        token = self.tokens.pop(channel, None)
+        if token is not None:
+            token.cancel()
+
+    def run(self, token, func, on_result, on_error):
+        try:
+            token.check()
+            result = func(token)
+        except Cancelled:
+            return
+        except Exception as e:
+            self.done.emit((token, on_error, e))
+            return
+        self.done.emit((token, on_result, result))
+
+    def deliver(self, item):
+        token, callback, value = item
+        if token.cancelled:
+            return
+        if callback is not None:
+            callback(value)
+        elif isinstance(value, Exception):
+            raise value
+
+    def shutdown(self):
+        for token in self.tokens.values():
+            token.cancel()
+        self.tokens.clear()
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,256 @@
+"""Потоковый пакетный расчёт фигур из CSV или Parquet.
+
+Входной файл содержит столбец shape с именем фигуры и столбцы параметров
+(a, b, c, r, h, n). Строки читаются блоками фиксированного размера, поэтому
+расход памяти не зависит от размера файла. Результаты пишутся в выходной
+файл по мере расчёта, отклонённые строки с текстом ошибки validate() -
+в отдельный файл.
+
+Запуск: python main.py batch input.csv output.csv [--rejected rejected.csv]
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+
+import numpy as np
+
+import geometry_core as core
+from geometry_batch import calculate_batch, param_names
+
+PARAM_COLUMNS = ["a", "b", "c", "r", "h", "n"]
+RESULT_COLUMNS = ["area", "perimeter", "volume", "diagonal", "median", "diameter"]
+NUMBER_ERROR = "Параметр не является числом"
+# типы столбцов выходных файлов; в отклонённых строках параметры остаются в виде исходного текста
+OUTPUT_COLUMNS = {"row": "int64", "shape": "string", **{name: "float64" for name in RESULT_COLUMNS}}
+REJECTED_COLUMNS = {"row": "int64", "shape": "string", **{name: "string" for name in PARAM_COLUMNS},
+                    "error": "string"}
+DEFAULT_CHUNK_SIZE = 100_000
+
+
+def _is_parquet(path):
+    return os.path.splitext(path)[1].lower() in (".parquet", ".pq")
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("Для работы с Parquet необходим пакет pyarrow") from None
+    return pyarrow
+
+
+def _parse_floats(values):
+    """Преобразование строк в числа; пустое значение означает 0, как пустое поле ввода"""
+    values = [v.strip() or "0" for v in values]
+    try:
+        return np.array(values, dtype=np.float64), np.zeros(len(values), dtype=bool)
+    except ValueError:
+        result = np.zeros(len(values), dtype=np.float64)
+        bad = np.zeros(len(values), dtype=bool)
+        for i, v in enumerate(values):
+            try:
+                result[i] = float(v)
+            except ValueError:
+                bad[i] = True
+        return result, bad
+
+
+class Chunk:
+    """Блок входных строк: имена фигур, параметры, исходный текст ячеек и маска ошибок разбора"""
+
+    def __init__(self, start, shapes, params, parse_errors, cells):
+        self.start = start
+        self.shapes = shapes
+        self.params = params
+        self.parse_errors = parse_errors
+        self.cells = cells
+
+    def __len__(self):
+        return len(self.shapes)
+
+
+def read_csv_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Чтение CSV блоками по chunk_size строк"""
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = [name.strip() for name in next(reader)]
+        if "shape" not in header:
+            raise ValueError("Во входном файле нет столбца shape")
+        shape_idx = header.index("shape")
+        param_idx = {name: header.index(name) for name in PARAM_COLUMNS if name in header}
+        start = 0
+        while True:
+            rows = [row for _, row in zip(range(chunk_size), reader)]
+            if not rows:
+                return
+            yield _chunk_from_rows(start, rows, shape_idx, param_idx)
+            start += len(rows)
+
+
+def _chunk_from_rows(start, rows, shape_idx, param_idx):
+    width = max(shape_idx, *param_idx.values()) + 1
+    rows = [row + [""] * (width - len(row)) if len(row) < width else row for row in rows]
+    shapes = np.array([row[shape_idx].strip() for row in rows], dtype=object)
+    params = {}
+    cells = {}
+    parse_errors = np.zeros(len(rows), dtype=bool)
+    for name in PARAM_COLUMNS:
+        if name in param_idx:
+            idx = param_idx[name]
+            cells[name] = np.array([row[idx] for row in rows], dtype=object)
+            params[name], bad = _parse_floats(cells[name])
+            parse_errors |= bad
+        else:
+            cells[name] = np.full(len(rows), "", dtype=object)
+            params[name] = np.zeros(len(rows), dtype=np.float64)
+    return Chunk(start, shapes, params, parse_errors, cells)
+
+
+def read_parquet_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Чтение Parquet блоками по chunk_size строк"""
+    pa = _import_pyarrow()
+    parquet_file = pa.parquet.ParquetFile(path)
+    start = 0
+    for batch in parquet_file.iter_batches(batch_size=chunk_size):
+        columns = dict(zip(batch.schema.names, batch.columns))
+        if "shape" not in columns:
+            raise ValueError("Во входном файле нет столбца shape")
+        shapes = np.array(columns["shape"].to_pylist(), dtype=object)
+        params = {}
+        cells = {}
+        parse_errors = np.zeros(len(shapes), dtype=bool)
+        for name in PARAM_COLUMNS:
+            if name not in columns:
+                cells[name] = np.full(len(shapes), "", dtype=object)
+                params[name] = np.zeros(len(shapes), dtype=np.float64)
+                continue
+            column = columns[name]
+            cells[name] = column.cast(pa.string()).fill_null("").to_numpy(zero_copy_only=False)
+            if pa.types.is_string(column.type) or pa.types.is_large_string(column.type):
+                # текстовый столбец разбирается так же, как ячейки CSV
+                params[name], bad = _parse_floats(cells[name])
+                parse_errors |= bad
+            else:
+                params[name] = column.cast(pa.float64()).fill_null(0).to_numpy(zero_copy_only=False)
+        yield Chunk(start, shapes, params, parse_errors, cells)
+        start += len(shapes)
+
+
+def read_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Чтение входного файла блоками; формат определяется по расширению"""
+    if _is_parquet(path):
+        return read_parquet_chunks(path, chunk_size)
+    return read_csv_chunks(path, chunk_size)
+
+
+def process_chunk(chunk):
+    """Расчёт блока; возвращает столбцы результатов и ошибки по строкам"""
+    n = len(chunk)
+    results = {name: np.full(n, np.nan) for name in RESULT_COLUMNS}
+    errors = np.full(n, None, dtype=object)
+    errors[chunk.parse_errors] = NUMBER_ERROR
+
+    for shape in set(chunk.shapes):
+        rows = np.flatnonzero((chunk.shapes == shape) & ~chunk.parse_errors)
+        if not len(rows):
+            continue
+        if shape not in core.SHAPES:
+            errors[rows] = f"Неизвестная фигура: {shape}"
+            continue
+        result = calculate_batch(shape, **{name: chunk.params[name][rows] for name in param_names(shape)})
+        for name, column in result.columns.items():
+            results[name][rows] = column
+        for i, message in result.errors():
+            errors[rows[i]] = message
+    return results, errors
+
+
+class CsvWriter:
+    """Потоковая запись столбцов в CSV"""
+
+    def __init__(self, path, columns):
+        self.file = open(path, "w", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(list(columns))
+
+    def write(self, columns):
+        self.writer.writerows(zip(*columns.values()))
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetWriter:
+    """Потоковая запись столбцов в Parquet группами строк"""
+
+    def __init__(self, path, columns):
+        self.pa = _import_pyarrow()
+        # схема задаётся заранее: по первому блоку из одних пропусков тип столбца не определить
+        self.schema = self.pa.schema([(name, getattr(self.pa, kind)()) for name, kind in columns.items()])
+        self.writer = self.pa.parquet.ParquetWriter(path, self.schema)
+
+    def write(self, columns):
+        self.writer.write_table(self.pa.table({name: columns[name] for name in self.schema.names},
+                                              schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+def open_writer(path, columns):
+    """Открытие выходного файла со столбцами columns (имя: тип pyarrow); формат определяется по расширению"""
+    if _is_parquet(path):
+        return ParquetWriter(path, columns)
+    return CsvWriter(path, columns)
+
+
+def run_batch(input_path, output_path, rejected_path=None, chunk_size=DEFAULT_CHUNK_SIZE, log=sys.stderr):
+    """Потоковый расчёт файла; возвращает число обработанных и отклонённых строк"""
+    output = open_writer(output_path, OUTPUT_COLUMNS)
+    rejected = open_writer(rejected_path, REJECTED_COLUMNS) if rejected_path else None
+
+    total = rejected_total = 0
+    started = time.perf_counter()
+    try:
+        for chunk in read_chunks(input_path, chunk_size):
+            results, errors = process_chunk(chunk)
+            rows = np.arange(chunk.start, chunk.start + len(chunk))
+            invalid = errors.astype(bool)
+            valid = ~invalid
+            output.write({"row": rows[valid], "shape": chunk.shapes[valid],
+                          **{name: results[name][valid] for name in RESULT_COLUMNS}})
+            if rejected is not None and invalid.any():
+                rejected.write({"row": rows[invalid], "shape": chunk.shapes[invalid],
+                                **{name: chunk.cells[name][invalid] for name in PARAM_COLUMNS},
+                                "error": errors[invalid]})
+
+            total += len(chunk)
+            rejected_total += int(invalid.sum())
+            elapsed = time.perf_counter() - started
+            print(f"{total} строк, {total / elapsed:.0f} строк/с", file=log)
+    finally:
+        output.close()
+        if rejected is not None:
+            rejected.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"Готово: {total} строк за {elapsed:.2f} с ({total / max(elapsed, 1e-9):.0f} строк/с), "
+          f"отклонено {rejected_total}", file=log)
+    return total, rejected_total
+
+
+def main(argv=None):
+    """Разбор аргументов командной строки пакетного режима"""
+    parser = argparse.ArgumentParser(prog="main.py batch", description="Пакетный расчёт фигур из CSV или Parquet")
+    parser.add_argument("input", help="входной файл .csv или .parquet")
+    parser.add_argument("output", help="выходной файл .csv или .parquet")
+    parser.add_argument("--rejected", help="файл для отклонённых строк с текстом ошибки")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="число строк в блоке")
+    args = parser.parse_args(argv)
+    if args.chunk_size <= 0:
+        parser.error("--chunk-size должен быть положительным")
+    run_batch(args.input, args.output, args.rejected, args.chunk_size)
+    return 0
@@ -0,0 +1,62 @@
+"""Оценка объёма и площади объединения большой сборки деталей.
+
+Сборка - случайные сферы, цилиндры, конусы и параллелепипеды в кубе;
+часть деталей ни с кем не пересекается и считается точно. Для каждого
+числа процессов выводятся результат, число точек и время.
+
+Запуск из корня проекта: python -m benchmarks.composite_volume [--parts N] [--tolerance T]
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+from composite_volume import Assembly, bbox_overlaps
+
+
+def make_assembly(parts, extent, seed=0):
+    rng = np.random.default_rng(seed)
+    assembly = Assembly()
+    for i in range(parts):
+        center = rng.uniform(0, extent, 3)
+        direction = rng.normal(size=3)
+        r, h, a, b, c = rng.uniform(0.5, 2, 5)
+        kind = i % 4
+        if kind == 0:
+            assembly.add("Sphere", center, r=r)
+        elif kind == 1:
+            assembly.add("Cylinder", center, direction, r=r, h=h)
+        elif kind == 2:
+            assembly.add("Cone", center, direction, r=r, h=h)
+        else:
+            assembly.add("Parallelepiped", center, a=a, b=b, c=c)
+    return assembly
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--parts", type=int, default=1000)
+    parser.add_argument("--extent", type=float, default=40.0, help="сторона куба, в котором лежат детали")
+    parser.add_argument("--tolerance", type=float, default=1e-3)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args(argv)
+
+    assembly = make_assembly(args.parts, args.extent)
+    lonely = sum(not len(n) for n in bbox_overlaps(assembly.parts))
+    total = sum(part.volume for part in assembly.parts)
+    print(f"деталей: {len(assembly)}, из них без пересечений: {lonely}, сумма объёмов: {total:.2f}")
+    workers = 1
+    while workers <= args.max_workers:
+        for name in ("union_volume", "union_area"):
+            started = time.perf_counter()
+            result = getattr(assembly, name)(tolerance=args.tolerance, workers=workers, seed=0)
+            elapsed = time.perf_counter() - started
+            print(f"{name}, процессов {workers}: {result.value:.4f} ± {result.error:.4f}, "
+                  f"точек {result.samples:,}, {elapsed:.2f} с, {result.samples / elapsed:,.0f} точек/с")
+        workers *= 2
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,62 @@
+"""Масштабирование многопроцессного расчёта от 1 до N ядер.
+
+Запуск из корня проекта: python -m benchmarks.parallel_scaling [--rows N]
+"""
+import argparse
+import os
+import time
+from dataclasses import fields
+
+import numpy as np
+
+import geometry_core as core
+from geometry_batch import calculate_batch
+from geometry_parallel import ParallelCalculator
+
+
+def make_params(shape, rows, seed=0):
+    """Случайные параметры фигуры shape, часть из которых некорректна; целые параметры - целые числа"""
+    rng = np.random.default_rng(seed)
+    return {f.name: rng.integers(0, 10, rows).astype(np.float64) if f.type is int else rng.uniform(0, 10, rows)
+            for f in fields(core.get_spec(shape).params)}
+
+
+def best_time(func, repeat):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20_000_000)
+    parser.add_argument("--shape", default="Triangle")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+    if min(args.rows, args.max_workers, args.chunk_size, args.repeat) <= 0:
+        parser.error("--rows, --max-workers, --chunk-size и --repeat должны быть положительными")
+    if args.shape not in core.SHAPES:
+        parser.error(f"неизвестная фигура: {args.shape}")
+
+    params = make_params(args.shape, args.rows)
+    serial = best_time(lambda: calculate_batch(args.shape, **params), args.repeat)
+    print(f"{args.shape}, {args.rows} строк, блок {args.chunk_size}")
+    print(f"{'процессов':>10} {'время, с':>10} {'строк/с':>14} {'ускорение':>10}")
+    print(f"{'без пула':>10} {serial:>10.3f} {args.rows / serial:>14.0f} {1:>10.2f}")
+
+    counts = {2 ** i for i in range(args.max_workers.bit_length())} | {args.max_workers}
+    for workers in sorted(counts):
+        with ParallelCalculator(workers, args.chunk_size) as calculator:
+            calculator.calculate(args.shape, **params)  # прогрев процессов пула
+            elapsed = best_time(lambda: calculator.calculate(args.shape, **params), args.repeat)
+        print(f"{workers:>10} {elapsed:>10.3f} {args.rows / elapsed:>14.0f} {serial / elapsed:>10.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
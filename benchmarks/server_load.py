@@ -0,0 +1,100 @@
+"""Нагрузка на локальный сервер расчёта: запросов в секунду и задержка.
+
+Сервер запускается в отдельном процессе, клиенты держат постоянные
+соединения и отправляют по одной заявке на запрос, так что сервер
+собирает пакеты из заявок разных соединений.
+
+Запуск из корня проекта: python -m benchmarks.server_load [--clients N]
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import time
+
+import numpy as np
+
+import calc_server
+
+SHAPES = [("Triangle", {"a": 3, "b": 4, "c": 5}), ("Circle", {"r": 2.5}), ("Cone", {"r": 1, "h": 2}),
+          ("Rhombus", {"a": 1, "h": 2})]
+
+
+def serve(port, window):
+    server = calc_server.CalculationServer(port=port, window=window)
+    asyncio.run(server.serve_forever())
+
+
+async def call(reader, writer, method, path, payload=None):
+    body = b"" if payload is None else json.dumps(payload).encode("utf-8")
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(body)}\r\n\r\n"
+                 .encode("latin-1") + body)
+    await writer.drain()
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line == b"\r\n":
+            break
+        if line.lower().startswith(b"content-length:"):
+            length = int(line.split(b":")[1])
+    return json.loads(await reader.readexactly(length))
+
+
+async def connect(port):
+    for _ in range(100):
+        try:
+            return await asyncio.open_connection(calc_server.DEFAULT_HOST, port)
+        except OSError:
+            await asyncio.sleep(0.05)
+    raise RuntimeError("Сервер не запустился")
+
+
+async def client(port, requests, latencies, seed):
+    reader, writer = await connect(port)
+    rng = np.random.default_rng(seed)
+    for i in rng.integers(0, len(SHAPES), requests):
+        shape, params = SHAPES[i]
+        started = time.perf_counter()
+        await call(reader, writer, "POST", "/calculate", {"shape": shape, "params": params})
+        latencies.append(time.perf_counter() - started)
+    writer.close()
+
+
+async def load(port, clients, requests):
+    latencies = []
+    # первое соединение дожидается запуска сервера
+    reader, writer = await connect(port)
+    started = time.perf_counter()
+    await asyncio.gather(*(client(port, requests, latencies, seed) for seed in range(clients)))
+    elapsed = time.perf_counter() - started
+    stats = await call(reader, writer, "GET", "/stats")
+    writer.close()
+    return elapsed, np.array(latencies), stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=500, help="запросов на клиента")
+    parser.add_argument("--window-ms", type=float, default=calc_server.DEFAULT_WINDOW * 1000)
+    parser.add_argument("--port", type=int, default=8799)
+    args = parser.parse_args(argv)
+
+    process = multiprocessing.Process(target=serve, args=(args.port, args.window_ms / 1000), daemon=True)
+    process.start()
+    try:
+        elapsed, latencies, stats = asyncio.run(load(args.port, args.clients, args.requests))
+    finally:
+        process.terminate()
+        process.join()
+
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+    print(f"клиентов: {args.clients}, запросов: {len(latencies)}, окно пакета: {args.window_ms} мс")
+    print(f"запросов в секунду: {len(latencies) / elapsed:,.0f}")
+    print(f"задержка у клиента, мс: p50 {p50:.2f}, p95 {p95:.2f}, p99 {p99:.2f}")
+    print(f"пакетов на сервере: {stats['batches']}, средний размер {stats['mean_batch']:.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
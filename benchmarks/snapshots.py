@@ -0,0 +1,48 @@
+"""Скорость снимков объёмных фигур: снимков в секунду и пиковая память.
+
+Рисуется серия случайных фигур всех шести видов во временный каталог;
+пиковая память берётся по ru_maxrss основного процесса и процессов пула.
+
+Запуск из корня проекта: python -m benchmarks.snapshots [--images N] [--workers N]
+"""
+import argparse
+import os
+import tempfile
+
+import numpy as np
+
+from snapshot import DEFAULT_SIZE, SNAPSHOT_SHAPES, render_jobs
+
+
+def make_jobs(images, seed=0):
+    """Поток заданий с корректными случайными параметрами"""
+    rng = np.random.default_rng(seed)
+    for row in range(images):
+        shape = SNAPSHOT_SHAPES[row % len(SNAPSHOT_SHAPES)]
+        a, b, c, r, h = rng.uniform(0.5, 3, 5)
+        params = {"Cube": {"a": a}, "Sphere": {"r": r}, "Cylinder": {"r": r, "h": h}, "Cone": {"r": r, "h": h},
+                  "Parallelepiped": {"a": a, "b": b, "c": c},
+                  "Pyramid": {"a": a, "h": h, "n": int(rng.integers(3, 9))}}[shape]
+        yield row, shape, params
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--images", type=int, default=10_000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--size", type=int, nargs=2, default=DEFAULT_SIZE, metavar=("W", "H"))
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        report = render_jobs(make_jobs(args.images), output_dir, tuple(args.size), args.workers)
+        size = sum(entry.stat().st_size for entry in os.scandir(output_dir))
+    print(f"снимков {args.size[0]}x{args.size[1]}: {report.images}, процессов: {args.workers}")
+    print(f"снимков в секунду: {report.rate:.1f} ({report.elapsed:.1f} с)")
+    print(f"пиковая память: основной процесс {report.peak_memory / 2 ** 20:.0f} МБ, "
+          f"процесс пула {report.peak_worker_memory / 2 ** 20:.0f} МБ")
+    print(f"объём файлов: {size / 2 ** 20:.1f} МБ")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
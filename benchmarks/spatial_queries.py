@@ -0,0 +1,83 @@
+"""Скорость запросов ShapeIndex на большом наборе плоских фигур.
+
+Замеряются построение индекса, запросы по точке и по прямоугольнику
+(запросов в секунду), добавление и удаление фигур и поиск всех
+пересекающихся пар.
+
+Запуск из корня проекта: python -m benchmarks.spatial_queries [--shapes N]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from shape_index import ShapeIndex
+
+
+def make_index(shapes, extent, seed=0):
+    """Индекс из поровну прямоугольников, кругов, треугольников и ромбов"""
+    rng = np.random.default_rng(seed)
+    n = shapes // 4
+    index = ShapeIndex()
+    for shape, params in (("Rectangle", {"a": rng.uniform(0.5, 3, n), "b": rng.uniform(0.5, 3, n)}),
+                          ("Circle", {"r": rng.uniform(0.3, 1.5, n)}),
+                          ("Triangle", {"a": rng.uniform(2, 3, n), "b": np.full(n, 2.0), "c": np.full(n, 2.0)}),
+                          ("Rhombus", {"a": rng.uniform(1, 3, n), "h": np.full(n, 0.9)})):
+        index.insert(shape, rng.uniform(0, extent, n), rng.uniform(0, extent, n), **params)
+    index.rebuild()
+    return index
+
+
+def rate(func, queries):
+    started = time.perf_counter()
+    for args in queries:
+        func(*args)
+    return len(queries) / (time.perf_counter() - started)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--shapes", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=20_000)
+    parser.add_argument("--single", type=int, default=10_000, help="добавлений и удалений по одной фигуре")
+    parser.add_argument("--box", type=float, default=10.0, help="сторона прямоугольника запроса")
+    args = parser.parse_args(argv)
+
+    # плотность около одной фигуры на 4 квадратные единицы
+    extent = np.sqrt(args.shapes * 4)
+    started = time.perf_counter()
+    index = make_index(args.shapes, extent)
+    print(f"построение индекса на {len(index)} фигурах: {time.perf_counter() - started:.2f} с")
+
+    rng = np.random.default_rng(1)
+    points = rng.uniform(0, extent, (args.queries, 2))
+    boxes = np.column_stack([points, points + args.box])
+    print(f"запросов по точке в секунду: {rate(index.contains_point, points):,.0f}")
+    print(f"запросов по прямоугольнику {args.box}x{args.box} в секунду: {rate(index.intersects_box, boxes):,.0f}")
+
+    n = min(10_000, len(index))
+    started = time.perf_counter()
+    ids = index.insert("Circle", rng.uniform(0, extent, n), rng.uniform(0, extent, n), r=np.ones(n))
+    index.delete(ids)
+    print(f"добавление и удаление {n} фигур одним пакетом: {time.perf_counter() - started:.2f} с")
+
+    # по одной фигуре: сюда входят и перестройки сетки после заполнения списка добавленных
+    coordinates = rng.uniform(0, extent, (args.single, 2))
+    started = time.perf_counter()
+    ids = [index.insert("Circle", x, y, r=1.0)[0] for x, y in coordinates]
+    inserted = time.perf_counter() - started
+    started = time.perf_counter()
+    for i in ids:
+        index.delete(i)
+    deleted = time.perf_counter() - started
+    print(f"добавление по одной фигуре: {inserted / args.single * 1e6:.0f} мкс, "
+          f"удаление: {deleted / args.single * 1e6:.0f} мкс (в среднем по {args.single})")
+
+    started = time.perf_counter()
+    pairs = index.overlapping_pairs()
+    print(f"пересекающихся пар: {len(pairs)}, поиск {time.perf_counter() - started:.2f} с")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,57 @@
+"""Время до первого окна с ленивым и прежним (жадным) созданием 3D-вида.
+
+Жадный режим воспроизводит старый запуск: pyvista и View3D с QtInteractor
+создаются вместе с окном. Каждый замер выполняется в отдельном процессе.
+
+Запуск из корня проекта: python -m benchmarks.startup_time [--runs N]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = """
+import sys, time
+started = time.perf_counter()
+from PySide6.QtCore import QTimer
+from PySide6.QtWidgets import QApplication
+import main
+app = QApplication(sys.argv)
+window = main.Window()
+if {eager}:
+    window.get_view3D()
+window.show()
+QTimer.singleShot(0, lambda: (print(time.perf_counter() - started, flush=True), app.quit()))
+app.exec()
+"""
+
+
+def measure(eager):
+    """Время до первого окна внутри процесса и полное время процесса"""
+    started = time.perf_counter()
+    output = subprocess.run([sys.executable, "-c", CHILD.format(eager=eager)], cwd=ROOT,
+                            capture_output=True, text=True, check=True).stdout
+    wall = time.perf_counter() - started
+    return float(output.split()[0]), wall
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    print(f"{'режим':>8} {'до окна, с':>12} {'процесс, с':>12}")
+    for title, eager in (("жадный", True), ("ленивый", False)):
+        samples = [measure(eager) for _ in range(args.runs)]
+        window = statistics.median(s[0] for s in samples)
+        wall = statistics.median(s[1] for s in samples)
+        print(f"{title:>8} {window:>12.3f} {wall:>12.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
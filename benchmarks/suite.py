@@ -0,0 +1,139 @@
+"""Набор замеров расчёта, проверки и отрисовки фигур без вывода на экран.
+
+Qt запускается с платформой offscreen, pyvista рисует во внеэкранный буфер.
+Результаты пишутся в JSON и сравниваются с сохранённым базовым прогоном:
+замер считается регрессией, если его медиана выросла больше чем на порог.
+
+Запуск из корня проекта:
+    python -m benchmarks.suite [--output results.json] [--baseline base.json] [--threshold 0.2]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+# допустимые параметры для каждой фигуры
+PARAMS = {
+    "Triangle": {"a": "3", "b": "4", "c": "5"},
+    "Rectangle": {"a": "3", "b": "4"},
+    "Square": {"a": "3"},
+    "Circle": {"r": "3"},
+    "Rhombus": {"a": "5", "h": "3"},
+    "Cube": {"a": "3"},
+    "Sphere": {"r": "3"},
+    "Cylinder": {"r": "2", "h": "5"},
+    "Cone": {"r": "2", "h": "5"},
+    "Parallelepiped": {"a": "2", "b": "3", "c": "4"},
+    "Pyramid": {"a": "2", "h": "5", "n": "6"},
+}
+
+
+def measure(func, runs, setup=None):
+    """Времена runs вызовов func; setup выполняется перед каждым вызовом вне замера"""
+    func()  # прогрев: ленивые импорты, создание актёров и элементов сцены
+    times = []
+    for _ in range(runs):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - started)
+    return {"median": statistics.median(times), "min": min(times), "runs": runs}
+
+
+def run_suite(runs, only=None):
+    """Все замеры; only - подстрока имени для выбора части замеров"""
+    import pyvista as pv
+    from PySide6.QtWidgets import QApplication
+
+    pv.OFF_SCREEN = True
+    app = QApplication.instance() or QApplication(sys.argv)
+    import geometry_core as core
+    from main import Window
+
+    window = Window()
+    window.show()
+    cases = {}
+    for name, values in PARAMS.items():
+        figure, _ = window.get_panel(name)
+        for param, text in values.items():
+            getattr(figure, f"{param}_edit").setText(text)
+        figure.read_params()
+
+        def cold(figure=figure):
+            figure.invalidate()
+            core.RESULT_CACHE.clear()
+
+        cases[f"{name}.calculate"] = (figure.calculate, cold)
+        cases[f"{name}.validate"] = (figure.validate, None)
+        cases[f"{name}.draw"] = (figure.draw, None)
+
+    view = window.get_view3D()
+    mesh = pv.Sphere()
+    cases["View3D.addItem"] = (lambda: view.addItem(mesh), view.clear)
+    cases["View3D.clear"] = (view.clear, lambda: view.addItem(mesh))
+
+    def switch_all():
+        for index in range(1, window.figure_selector.count()):
+            window.figure_selector.setCurrentIndex(index)
+        window.figure_selector.setCurrentIndex(0)
+
+    cases["Window.figure_selected"] = (switch_all, None)
+
+    results = {}
+    for case, (func, setup) in cases.items():
+        if only is None or only in case:
+            results[case] = measure(func, runs, setup)
+            app.processEvents()
+    window.close()
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Замеры, медиана которых выросла относительно базового прогона больше чем на threshold"""
+    regressions = {}
+    for case, result in results.items():
+        base = baseline.get(case)
+        if base is not None and result["median"] > base["median"] * (1 + threshold):
+            regressions[case] = result["median"] / base["median"] - 1
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--only", help="подстрока имени замера")
+    parser.add_argument("--output", help="файл JSON для результатов")
+    parser.add_argument("--baseline", help="файл JSON базового прогона")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="допустимый рост медианы, доля (по умолчанию 0.2)")
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.runs, args.only)
+    print(f"{'замер':<28} {'медиана, мс':>12} {'минимум, мс':>12}")
+    for case, result in results.items():
+        print(f"{case:<28} {result['median'] * 1e3:>12.3f} {result['min'] * 1e3:>12.3f}")
+
+    if args.output:
+        report = {"python": platform.python_version(), "platform": platform.platform(), "results": results}
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        for case, growth in regressions.items():
+            print(f"Регрессия: {case} медленнее на {growth:.0%}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
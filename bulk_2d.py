@@ -0,0 +1,153 @@
+"""Слой для отрисовки десятков тысяч плоских фигур одним элементом сцены.
+
+Вместо отдельного QGraphicsItem на каждую фигуру BulkShapeLayer хранит
+контуры в ShapeIndex и рисует их сам. При отрисовке и поиске фигур
+под курсором пространственный индекс отбирает только фигуры в видимой
+области; если видна большая часть слоя, рисуются заранее собранные общие
+контуры каждого вида фигур.
+"""
+import numpy as np
+from PySide6.QtCore import QRectF, QPointF, Qt
+from PySide6.QtGui import QPainterPath, QPen, QPolygonF
+from PySide6.QtWidgets import QGraphicsItem
+
+from shape_index import ShapeIndex, RECT, CIRCLE, POLYGON
+
+# при такой доле видимых фигур дешевле нарисовать общий контур целиком
+FULL_PATH_FRACTION = 0.5
+
+
+class BulkShapeLayer(QGraphicsItem):
+    """Один элемент сцены, рисующий множество плоских фигур"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setFlag(QGraphicsItem.ItemUsesExtendedStyleOption, True)
+        self.pen = QPen(Qt.black, 0)
+        self.reset()
+
+    def reset(self):
+        self.shapes = ShapeIndex()
+        self.full_paths = None
+        self.full_shape = None
+        # общий ограничивающий прямоугольник (xmin, ymin, xmax, ymax) живых фигур
+        self.bounds = None
+
+    def __len__(self):
+        return len(self.shapes)
+
+    def set_bounds(self, bounds):
+        """Новые границы слоя; сцена уведомляется только при их изменении"""
+        if bounds != self.bounds:
+            self.prepareGeometryChange()
+            self.bounds = bounds
+
+    def changed(self):
+        self.full_paths = None
+        self.full_shape = None
+        self.update()
+
+    def add_shapes(self, shape, x, y, **params):
+        """Добавление фигур shape с левыми верхними углами (x, y); возвращает номера добавленных"""
+        ids = self.shapes.insert(shape, x, y, **params)
+        if len(ids):
+            bboxes = self.shapes.bboxes[ids]
+            bounds = (*bboxes[:, :2].min(axis=0), *bboxes[:, 2:].max(axis=0))
+            if self.bounds is not None:
+                bounds = (min(bounds[0], self.bounds[0]), min(bounds[1], self.bounds[1]),
+                          max(bounds[2], self.bounds[2]), max(bounds[3], self.bounds[3]))
+            self.set_bounds(tuple(map(float, bounds)))
+            self.changed()
+        return ids
+
+    def delete_shapes(self, ids):
+        ids = np.atleast_1d(np.asarray(ids, dtype=np.int64))
+        bboxes = self.shapes.bboxes[ids]
+        self.shapes.delete(ids)
+        # границы пересчитываются, только если удалённая фигура касалась края слоя
+        if self.bounds is not None and len(bboxes) and (
+                (bboxes[:, :2] <= self.bounds[:2]).any() or (bboxes[:, 2:] >= self.bounds[2:]).any()):
+            alive = self.shapes.bboxes[self.shapes.alive]
+            if len(alive):
+                self.set_bounds(tuple(map(float, (*alive[:, :2].min(axis=0), *alive[:, 2:].max(axis=0)))))
+            else:
+                self.set_bounds(None)
+        self.changed()
+
+    def clear_shapes(self):
+        self.set_bounds(None)
+        self.reset()
+        self.update()
+
+    def boundingRect(self):
+        if self.bounds is None:
+            return QRectF()
+        xmin, ymin, xmax, ymax = self.bounds
+        return QRectF(xmin, ymin, xmax - xmin, ymax - ymin)
+
+    def shape(self):
+        """Общий контур всех фигур, а не ограничивающий прямоугольник слоя"""
+        if self.full_shape is None:
+            self.full_shape = self.make_path(np.flatnonzero(self.shapes.alive))
+        return self.full_shape
+
+    def contains(self, point):
+        # проверяются только фигуры, отобранные индексом у точки
+        return bool(len(self.shapes.contains_point(point.x(), point.y())))
+
+    def collidesWithPath(self, path, mode=Qt.IntersectsItemShape):
+        if mode not in (Qt.IntersectsItemShape, Qt.ContainsItemShape):
+            return super().collidesWithPath(path, mode)
+        rect = path.boundingRect()
+        ids = self.shapes_in(rect.left(), rect.top(), rect.right(), rect.bottom())
+        if not len(ids):
+            return False
+        if mode == Qt.ContainsItemShape:
+            # путь должен целиком содержать слой, то есть все его фигуры
+            return len(ids) == len(self) and path.contains(self.shape())
+        return path.intersects(self.make_path(ids))
+
+    def make_path(self, ids):
+        """Общий контур фигур с номерами ids"""
+        path = QPainterPath()
+        kinds, bboxes, vertices = self.shapes.kinds, self.shapes.bboxes, self.shapes.vertices
+        for i in ids:
+            kind = kinds[i]
+            if kind == POLYGON:
+                path.addPolygon(QPolygonF([QPointF(x, y) for x, y in vertices[i]]))
+                path.closeSubpath()
+            else:
+                xmin, ymin, xmax, ymax = bboxes[i]
+                rect = QRectF(xmin, ymin, xmax - xmin, ymax - ymin)
+                if kind == RECT:
+                    path.addRect(rect)
+                else:
+                    path.addEllipse(rect)
+        return path
+
+    def paint(self, painter, option, widget=None):
+        rect = option.exposedRect
+        ids = self.shapes.candidates(rect.left(), rect.top(), rect.right(), rect.bottom())
+        if not len(ids):
+            return
+        painter.setPen(self.pen)
+        if len(ids) > FULL_PATH_FRACTION * len(self):
+            if self.full_paths is None:
+                alive = self.shapes.alive
+                self.full_paths = [self.make_path(np.flatnonzero(alive & (self.shapes.kinds == kind)))
+                                   for kind in (RECT, CIRCLE, POLYGON)]
+            for path in self.full_paths:
+                painter.drawPath(path)
+        else:
+            painter.drawPath(self.make_path(ids))
+
+    def shapes_at(self, x, y):
+        """Номера фигур, содержащих точку (x, y)"""
+        return self.shapes.contains_point(x, y)
+
+    def shapes_in(self, xmin, ymin, xmax, ymax):
+        """Номера фигур, пересекающих прямоугольник"""
+        return self.shapes.intersects_box(xmin, ymin, xmax, ymax)
+
+    def shape_name(self, i):
+        return self.shapes.shape_name(i)
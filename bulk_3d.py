@@ -0,0 +1,95 @@
+"""Отрисовка множества объёмных фигур одного типа одним актёром.
+
+Каждая фигура - экземпляр единичной сетки (куб, сфера, цилиндр, конус),
+растянутый по осям и сдвинутый в свою точку. Экземпляры рисует
+vtkGlyph3DMapper, поэтому сетка хранится один раз, а на фигуру приходится
+только точка, масштаб и цвет.
+"""
+import numpy as np
+
+from geometry_batch import calculate_batch
+from mesh_cache import cached_mesh
+
+# единичные сетки: цилиндр и конус в pyvista направлены вдоль оси x
+UNIT_MESHES = {
+    "Cube": ("cube", {}),
+    "Parallelepiped": ("cube", {}),
+    "Sphere": ("sphere", {"radius": 1}),
+    "Cylinder": ("cylinder", {"radius": 1, "height": 1}),
+    "Cone": ("cone", {"radius": 1, "height": 1}),
+}
+
+
+def instance_scales(shape, **params):
+    """Масштабы единичной сетки по осям для каждой фигуры, массив (n, 3)"""
+    values = {name: np.ravel(np.asarray(value, dtype=np.float64)) for name, value in params.items()}
+    if shape == "Cube":
+        a = values["a"]
+        return np.column_stack([a, a, a])
+    if shape == "Parallelepiped":
+        return np.column_stack(np.broadcast_arrays(values["a"], values["b"], values["c"]))
+    if shape == "Sphere":
+        r = values["r"]
+        return np.column_stack([r, r, r])
+    if shape in ("Cylinder", "Cone"):
+        r, h = np.broadcast_arrays(values["r"], values["h"])
+        return np.column_stack([h, r, r])
+    raise ValueError(f"Нет единичной сетки для фигуры: {shape}")
+
+
+def unit_mesh(shape, segments=8):
+    """Единичная сетка фигуры shape с segments сегментами по окружности"""
+    kind, params = UNIT_MESHES[shape]
+    if kind == "sphere":
+        return cached_mesh(kind, **params, theta_resolution=segments, phi_resolution=max(segments // 2, 4))
+    if kind == "cube":
+        return cached_mesh(kind)
+    return cached_mesh(kind, **params, resolution=segments)
+
+
+def make_instances(shape, positions, colors=None, **params):
+    """Облако точек экземпляров с массивами "scale" и "color"; неверные фигуры отбрасываются"""
+    import pyvista as pv
+
+    positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+    valid = np.broadcast_to(calculate_batch(shape, **params).valid, len(positions))
+    scales = np.broadcast_to(instance_scales(shape, **params), positions.shape)
+    points = pv.PolyData(np.ascontiguousarray(positions[valid]))
+    points.point_data["scale"] = np.ascontiguousarray(scales[valid])
+    if colors is not None:
+        colors = np.asarray(colors)
+        if colors.ndim == 2:
+            colors = colors.astype(np.uint8)
+        colors = np.broadcast_to(colors, (len(positions),) + colors.shape[1:])
+        points.point_data["color"] = np.ascontiguousarray(colors[valid])
+    return points
+
+
+def make_glyph_mapper(source, instances):
+    """Маппер, рисующий source в каждой точке instances с масштабом по осям и цветом"""
+    from vtkmodules.vtkRenderingCore import vtkGlyph3DMapper
+
+    mapper = vtkGlyph3DMapper()
+    mapper.SetSourceData(source)
+    mapper.SetInputData(instances)
+    mapper.OrientOff()
+    mapper.SetScaleArray("scale")
+    mapper.SetScaleModeToScaleByVectorComponents()
+    set_glyph_colors(mapper, instances)
+    return mapper
+
+
+def set_glyph_colors(mapper, instances):
+    """Цвет экземпляров: RGB (n, 3) в 0..255 напрямую, скаляры (n,) через палитру"""
+    if "color" not in instances.point_data:
+        mapper.ScalarVisibilityOff()
+        return
+    colors = instances.point_data["color"]
+    mapper.ScalarVisibilityOn()
+    mapper.SetScalarModeToUsePointFieldData()
+    mapper.SelectColorArray("color")
+    if colors.ndim == 2:
+        mapper.SetColorModeToDirectScalars()
+    else:
+        mapper.SetColorModeToMapScalars()
+        mapper.SetScalarRange(float(colors.min()), float(colors.max()))
@@ -0,0 +1,354 @@
+"""Локальный сервер расчёта фигур: JSON поверх HTTP на asyncio.
+
+POST /calculate принимает одну заявку {"shape": "Circle", "params": {"r": 2}}
+или список заявок и отвечает в том же виде: для каждой заявки словарь
+характеристик, как у calculate() в окне программы, или {"error": текст}
+с тем же сообщением, что выдаёт validate(). Заявки разных клиентов к одной
+фигуре, пришедшие в течение короткого окна, собираются в пакет и
+считаются одним вызовом calculate_batch. GET /stats возвращает счётчики
+запросов, размеры пакетов и перцентили задержки.
+
+Запуск: python main.py serve [--port 8765] [--window-ms 2]
+"""
+import argparse
+import asyncio
+import json
+import math
+import time
+from collections import deque
+from dataclasses import fields
+
+import numpy as np
+
+import geometry_core as core
+from geometry_batch import calculate_batch
+from timing import Timings
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_WINDOW = 0.002
+DEFAULT_MAX_BATCH = 4096
+MAX_BODY = 64 << 20
+STATS_WINDOW = 10_000
+NUMBER_ERROR = "Параметр не является числом"
+OVERFLOW_ERROR = "Результат слишком велик"
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large"}
+
+
+class RequestError(Exception):
+    """Ошибка запроса целиком; отдаётся клиенту с кодом status"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_item(item):
+    """Имя фигуры и кортеж значений параметров из заявки; ошибка заявки - ValueError.
+
+    Незаданные параметры равны 0, как незаполненные поля ввода.
+    """
+    if not isinstance(item, dict):
+        raise ValueError("Заявка должна быть объектом JSON")
+    shape = item.get("shape")
+    spec = core.get_spec(shape if isinstance(shape, str) else str(shape))
+    params = item.get("params", {})
+    if not isinstance(params, dict):
+        raise ValueError("Параметры должны быть объектом JSON")
+    unknown = params.keys() - set(spec.param_names)
+    if unknown:
+        raise ValueError(f"Неизвестные параметры: {', '.join(sorted(unknown))}")
+    values = []
+    for f in fields(spec.params):
+        value = params.get(f.name, f.default)
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(NUMBER_ERROR)
+        try:
+            value = float(value)
+        except OverflowError:
+            raise ValueError(core.FINITE_ERROR) from None
+        # NaN и Infinity, которые пропускает json.loads, и дробные целые параметры отклоняет проверка пакета
+        values.append(value)
+    return spec.name, tuple(values)
+
+
+class ServerStats:
+    """Счётчики сервера и скользящие окна задержек"""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.requests = 0
+        self.bad_requests = 0
+        self.items = 0
+        self.errors = 0
+        self.batches = 0
+        self.batched_items = 0
+        self.max_batch = 0
+        self.timings = Timings(window=STATS_WINDOW)
+        # моменты завершения последних запросов для текущей пропускной способности
+        self.finished = deque(maxlen=STATS_WINDOW)
+
+    def record_request(self, seconds):
+        self.requests += 1
+        self.finished.append(time.monotonic())
+        self.timings.record("server", "request", seconds)
+
+    def record_batch(self, size, seconds):
+        self.batches += 1
+        self.batched_items += size
+        self.max_batch = max(self.max_batch, size)
+        self.timings.record("server", "batch", seconds)
+
+    def recent_rate(self, now):
+        """Запросов в секунду за последнюю секунду"""
+        finished = np.array(self.finished)
+        return int((finished > now - 1).sum())
+
+    def snapshot(self):
+        now = time.monotonic()
+        uptime = now - self.started
+        latency = {}
+        for stage in ("request", "batch"):
+            values = self.timings.values("server", stage)
+            if len(values):
+                p50, p95, p99 = np.percentile(values, [50, 95, 99]) * 1000
+                latency[stage] = {"count": len(values), "p50_ms": p50, "p95_ms": p95, "p99_ms": p99}
+        return {
+            "uptime": uptime,
+            "requests": self.requests,
+            "bad_requests": self.bad_requests,
+            "items": self.items,
+            "errors": self.errors,
+            "batches": self.batches,
+            "mean_batch": self.batched_items / self.batches if self.batches else 0.0,
+            "max_batch": self.max_batch,
+            "requests_per_second": self.recent_rate(now),
+            "mean_requests_per_second": self.requests / uptime if uptime else 0.0,
+            "mean_items_per_second": self.items / uptime if uptime else 0.0,
+            "latency": latency,
+        }
+
+
+class Batcher:
+    """Сбор заявок к одной фигуре в пакеты для calculate_batch.
+
+    Первая заявка фигуры запускает таймер на window секунд; по его истечении
+    или при наборе max_batch заявок пакет считается, а каждая заявка получает
+    свой словарь характеристик или текст ошибки через Future.
+    """
+
+    def __init__(self, stats, window=DEFAULT_WINDOW, max_batch=DEFAULT_MAX_BATCH):
+        self.stats = stats
+        self.window = window
+        self.max_batch = max_batch
+        self.queues = {}
+        self.timers = {}
+
+    def submit(self, shape, values):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        queue = self.queues.setdefault(shape, [])
+        queue.append((values, future))
+        if len(queue) >= self.max_batch:
+            self.flush(shape)
+        elif shape not in self.timers:
+            self.timers[shape] = loop.call_later(self.window, self.flush, shape)
+        return future
+
+    def flush(self, shape):
+        timer = self.timers.pop(shape, None)
+        if timer is not None:
+            timer.cancel()
+        queue = self.queues.pop(shape, [])
+        if not queue:
+            return
+        started = time.perf_counter()
+        try:
+            spec = core.get_spec(shape)
+            columns = np.array([values for values, _ in queue], dtype=np.float64).T
+            with np.errstate(over="ignore"):
+                result = calculate_batch(shape, **dict(zip(spec.param_names, columns)))
+        except Exception as e:
+            # flush вызывается из call_later: без ответа заявки пакета ждали бы вечно
+            self.stats.errors += len(queue)
+            for _, future in queue:
+                if not future.done():
+                    future.set_result({"error": str(e)})
+            return
+        names = list(result.columns)
+        rows = zip(*(result.columns[name].tolist() for name in names))
+        for (_, future), code, row in zip(queue, result.error_codes.tolist(), rows):
+            if future.done():
+                continue
+            if code:
+                self.stats.errors += 1
+                future.set_result({"error": result.messages[code - 1]})
+            elif not all(map(math.isfinite, row)):
+                self.stats.errors += 1
+                future.set_result({"error": OVERFLOW_ERROR})
+            else:
+                future.set_result(dict(zip(names, row)))
+        self.stats.record_batch(len(queue), time.perf_counter() - started)
+
+    def flush_all(self):
+        for shape in list(self.queues):
+            self.flush(shape)
+
+
+class CalculationServer:
+    """HTTP-сервер с постоянными соединениями поверх asyncio.start_server"""
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, window=DEFAULT_WINDOW, max_batch=DEFAULT_MAX_BATCH):
+        self.host = host
+        self.port = port
+        self.stats = ServerStats()
+        self.batcher = Batcher(self.stats, window, max_batch)
+        self.server = None
+        # соединение -> задача, которая его обслуживает
+        self.connections = {}
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        # при порте 0 система выбирает свободный
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def serve_forever(self):
+        if self.server is None:
+            await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def close(self):
+        self.batcher.flush_all()
+        self.server.close()
+        for writer in self.connections:
+            writer.close()
+        # обработчики завершаются сами, увидев закрытое соединение
+        await asyncio.gather(*self.connections.values(), return_exceptions=True)
+        await self.server.wait_closed()
+
+    async def calculate(self, payload):
+        """Ответ на заявку или список заявок"""
+        items = payload if isinstance(payload, list) else [payload]
+        self.stats.items += len(items)
+        answers = []
+        for item in items:
+            try:
+                answers.append(self.batcher.submit(*parse_item(item)))
+            except ValueError as e:
+                self.stats.errors += 1
+                answers.append({"error": str(e.args[0])})
+        answers = [await answer if isinstance(answer, asyncio.Future) else answer for answer in answers]
+        return answers if isinstance(payload, list) else answers[0]
+
+    async def respond(self, method, path, body):
+        """Код ответа и объект JSON для запроса"""
+        if path == "/stats":
+            if method != "GET":
+                raise RequestError(405, "Ожидается запрос GET")
+            return self.stats.snapshot()
+        if path == "/calculate":
+            if method != "POST":
+                raise RequestError(405, "Ожидается запрос POST")
+            try:
+                payload = json.loads(body)
+            except (ValueError, UnicodeDecodeError):
+                raise RequestError(400, "Тело запроса не является JSON") from None
+            return await self.calculate(payload)
+        raise RequestError(404, f"Неизвестный адрес: {path}")
+
+    async def handle_connection(self, reader, writer):
+        self.connections[writer] = asyncio.current_task()
+        try:
+            while True:
+                request = await read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                started = time.perf_counter()
+                try:
+                    status, answer = 200, await self.respond(method, path, body)
+                except RequestError as e:
+                    self.stats.bad_requests += 1
+                    status, answer = e.status, {"error": str(e.args[0])}
+                keep_alive = headers.get("connection", "").lower() != "close"
+                writer.write(encode_response(status, answer, keep_alive))
+                await writer.drain()
+                if path == "/calculate" and status == 200:
+                    self.stats.record_request(time.perf_counter() - started)
+                if not keep_alive:
+                    break
+        except RequestError as e:
+            # запрос не разобран, соединение дальше использовать нельзя
+            self.stats.bad_requests += 1
+            writer.write(encode_response(e.status, {"error": str(e.args[0])}, False))
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.connections.pop(writer, None)
+            writer.close()
+
+
+async def read_request(reader):
+    """Метод, путь, заголовки и тело запроса HTTP/1.1 или None при закрытом соединении"""
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        method, target, _ = line.decode("latin-1").split()
+    except ValueError:
+        raise RequestError(400, "Неверная строка запроса") from None
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        raise RequestError(400, "Неверный заголовок Content-Length") from None
+    if length < 0:
+        raise RequestError(400, "Неверный заголовок Content-Length")
+    if length > MAX_BODY:
+        raise RequestError(413, "Слишком большое тело запроса")
+    body = await reader.readexactly(length) if length else b""
+    return method, target.split("?")[0], headers, body
+
+
+def encode_response(status, answer, keep_alive=True):
+    body = json.dumps(answer, ensure_ascii=False).encode("utf-8")
+    head = (f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode("latin-1") + body
+
+
+def main(argv=None):
+    """Разбор аргументов командной строки режима сервера"""
+    parser = argparse.ArgumentParser(prog="main.py serve", description="Локальный сервер расчёта фигур")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--window-ms", type=float, default=DEFAULT_WINDOW * 1000,
+                        help="окно сбора заявок в пакет, мс")
+    parser.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH, help="наибольший размер пакета")
+    args = parser.parse_args(argv)
+    if args.window_ms < 0 or args.max_batch <= 0:
+        parser.error("окно не может быть отрицательным, размер пакета должен быть положительным")
+
+    server = CalculationServer(args.host, args.port, args.window_ms / 1000, args.max_batch)
+
+    async def run():
+        await server.start()
+        print(f"сервер расчёта: http://{server.host}:{server.port}", flush=True)
+        await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    return 0
@@ -0,0 +1,328 @@
+"""Объём и площадь поверхности составных тел из сфер, цилиндров, конусов и параллелепипедов.
+
+Деталь сборки - фигура из geometry_core с центром и, для цилиндра и
+конуса, направлением оси (как у сеток pyvista: ось x, вершина конуса в
+center + direction * h / 2). Параллелепипед и куб выровнены по осям.
+
+Детали, чьи ограничивающие параллелепипеды ни с кем не пересекаются,
+дают точный объём и площадь по формулам ядра (те же, что у get_volume).
+Для остальных объединение и пересечение оцениваются методом Монте-Карло
+по пакетам точек NumPy: точки берутся равномерно внутри (или на
+поверхности) случайно выбранной детали, и проверяются только детали,
+пересекающиеся с ней по ограничивающим параллелепипедам. Для объёма
+объединения точка детали i учитывается с весом 1/k, где k - число
+содержащих её деталей, поэтому оценка несмещённая и не требует
+ограничивающего объёма сборки. Пакеты набираются, пока полуширина 95%
+доверительного интервала не станет меньше tolerance от результата;
+при workers > 1 пакеты считаются в пуле процессов.
+"""
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import geometry_core as core
+
+COMPOSITE_SHAPES = ("Cube", "Parallelepiped", "Sphere", "Cylinder", "Cone")
+DEFAULT_TOLERANCE = 1e-3
+DEFAULT_BATCH_SIZE = 1 << 16
+DEFAULT_MAX_SAMPLES = 1 << 26
+# без единого попадания расчёт продолжается до этого числа точек
+EMPTY_SAMPLES = 1 << 20
+# квантиль нормального распределения для 95% доверительного интервала
+Z_95 = 1.96
+
+
+class Part:
+    """Деталь сборки: фигура с параметрами, центром и направлением оси"""
+
+    def __init__(self, shape, center=(0, 0, 0), direction=(1, 0, 0), **params):
+        if shape not in COMPOSITE_SHAPES:
+            raise ValueError(f"Фигура не поддерживается в сборке: {shape}")
+        values = core.make_params(shape, **params)
+        core.validate(values)
+        result = core.calculate(values)
+        self.shape = shape
+        self.params = params
+        self.volume = result["volume"]
+        self.area = result["area"]
+        self.center = np.asarray(center, dtype=np.float64)
+        direction = np.asarray(direction, dtype=np.float64)
+        length = np.linalg.norm(direction)
+        if not length:
+            raise ValueError("Направление оси не может быть нулевым")
+        self.direction = direction / length
+        # два единичных вектора, перпендикулярных оси
+        helper = np.eye(3)[np.argmin(np.abs(self.direction))]
+        self.u = np.cross(self.direction, helper)
+        self.u /= np.linalg.norm(self.u)
+        self.v = np.cross(self.direction, self.u)
+        self.low, self.high = self.center - self.extent(), self.center + self.extent()
+
+    def half_sizes(self):
+        """Половины рёбер параллелепипеда"""
+        p = self.params
+        if self.shape == "Cube":
+            return np.full(3, p["a"] / 2)
+        return np.array([p["a"], p["b"], p["c"]], dtype=np.float64) / 2
+
+    def extent(self):
+        """Половины размеров ограничивающего параллелепипеда по осям"""
+        if self.shape in ("Cube", "Parallelepiped"):
+            return self.half_sizes()
+        if self.shape == "Sphere":
+            return np.full(3, float(self.params["r"]))
+        r, h = self.params["r"], self.params["h"]
+        d = self.direction
+        return np.abs(d) * h / 2 + r * np.sqrt(np.maximum(1 - d * d, 0))
+
+    def contains(self, points):
+        """Маска точек (m, 3), лежащих внутри детали или на её границе"""
+        local = points - self.center
+        if self.shape in ("Cube", "Parallelepiped"):
+            return (np.abs(local) <= self.half_sizes()).all(axis=1)
+        if self.shape == "Sphere":
+            return np.einsum("ij,ij->i", local, local) <= self.params["r"] ** 2
+        r, h = self.params["r"], self.params["h"]
+        axial = local @ self.direction
+        radial2 = np.einsum("ij,ij->i", local, local) - axial * axial
+        inside = np.abs(axial) <= h / 2
+        if self.shape == "Cylinder":
+            return inside & (radial2 <= r * r)
+        # радиус конуса убывает от r у основания (-h/2) до 0 у вершины (h/2)
+        radius = r * (0.5 - axial / h)
+        return inside & (radial2 <= radius * radius)
+
+    def _to_world(self, axial, radius, angle):
+        """Точки в системе оси детали: смещение вдоль оси, расстояние от оси и угол"""
+        return (self.center + axial[:, None] * self.direction
+                + (radius * np.cos(angle))[:, None] * self.u + (radius * np.sin(angle))[:, None] * self.v)
+
+    def sample_volume(self, rng, n):
+        """n точек, равномерно распределённых внутри детали"""
+        if self.shape in ("Cube", "Parallelepiped"):
+            return self.center + rng.uniform(-1, 1, (n, 3)) * self.half_sizes()
+        if self.shape == "Sphere":
+            direction = rng.normal(size=(n, 3))
+            direction /= np.linalg.norm(direction, axis=1)[:, None]
+            return self.center + direction * (self.params["r"] * np.cbrt(rng.random(n)))[:, None]
+        r, h = self.params["r"], self.params["h"]
+        angle = rng.uniform(0, 2 * np.pi, n)
+        if self.shape == "Cylinder":
+            return self._to_world(rng.uniform(-h / 2, h / 2, n), r * np.sqrt(rng.random(n)), angle)
+        # доля высоты от вершины s распределена с плотностью 3 s^2
+        s = np.cbrt(rng.random(n))
+        return self._to_world(h / 2 - s * h, r * s * np.sqrt(rng.random(n)), angle)
+
+    def sample_surface(self, rng, n):
+        """n точек, равномерно распределённых по поверхности детали"""
+        if self.shape in ("Cube", "Parallelepiped"):
+            half = self.half_sizes()
+            # грань, перпендикулярная оси k, имеет площадь 4 * произведение двух других половин
+            areas = np.array([half[1] * half[2], half[0] * half[2], half[0] * half[1]])
+            axis = rng.choice(3, n, p=areas / areas.sum())
+            local = rng.uniform(-1, 1, (n, 3))
+            local[np.arange(n), axis] = rng.choice([-1.0, 1.0], n)
+            return self.center + local * half
+        if self.shape == "Sphere":
+            direction = rng.normal(size=(n, 3))
+            direction /= np.linalg.norm(direction, axis=1)[:, None]
+            return self.center + direction * self.params["r"]
+        r, h = self.params["r"], self.params["h"]
+        angle = rng.uniform(0, 2 * np.pi, n)
+        base = np.pi * r * r
+        if self.shape == "Cylinder":
+            side = rng.random(n) < 2 * np.pi * r * h / (2 * np.pi * r * h + 2 * base)
+            axial = np.where(side, rng.uniform(-h / 2, h / 2, n), rng.choice([-h / 2, h / 2], n))
+            return self._to_world(axial, np.where(side, r, r * np.sqrt(rng.random(n))), angle)
+        lateral = np.pi * r * np.hypot(r, h)
+        side = rng.random(n) < lateral / (lateral + base)
+        # на боковой поверхности плотность растёт линейно с расстоянием от вершины
+        s = np.where(side, np.sqrt(rng.random(n)), 1.0)
+        radius = np.where(side, r * s, r * np.sqrt(rng.random(n)))
+        return self._to_world(h / 2 - s * h, radius, angle)
+
+
+def bbox_overlaps(parts):
+    """Списки соседей: детали, чьи ограничивающие параллелепипеды пересекаются"""
+    low = np.array([part.low for part in parts]).reshape(-1, 3)
+    high = np.array([part.high for part in parts]).reshape(-1, 3)
+    neighbors = []
+    for i in range(len(parts)):
+        hit = ((low <= high[i]) & (high >= low[i])).all(axis=1)
+        hit[i] = False
+        neighbors.append(np.flatnonzero(hit))
+    return neighbors
+
+
+class Estimate:
+    """Оценка величины: значение, полуширина 95% интервала и число точек"""
+
+    def __init__(self, value, error=0.0, samples=0, converged=True):
+        self.value = value
+        self.error = error
+        self.samples = samples
+        self.converged = converged
+
+    def __float__(self):
+        return float(self.value)
+
+    def __repr__(self):
+        return f"Estimate({self.value:.6g} ± {self.error:.2g}, samples={self.samples})"
+
+
+def sample_batch(parts, neighbors, sources, weights, quantity, mode, n, seed):
+    """Сумма и сумма квадратов оценок по n точкам; источник точки выбирается с весами weights.
+
+    Для объёма объединения точка детали i даёт 1/k (k - число содержащих её
+    деталей), для площади объединения - 1, если точка поверхности i не
+    лежит внутри других деталей; для пересечения - 1, если точка лежит во
+    всех остальных деталях.
+    """
+    rng = np.random.default_rng(seed)
+    counts = rng.multinomial(n, weights)
+    total = squares = 0.0
+    for i, count in zip(sources, counts):
+        if not count:
+            continue
+        part = parts[i]
+        points = part.sample_volume(rng, count) if quantity == "volume" else part.sample_surface(rng, count)
+        others = neighbors[i] if mode == "union" else [j for j in range(len(parts)) if j != i]
+        inside = np.zeros(count, dtype=np.int64)
+        for j in others:
+            other = parts[j]
+            # сначала дешёвая проверка по ограничивающему параллелепипеду
+            near = np.flatnonzero(((points >= other.low) & (points <= other.high)).all(axis=1))
+            if len(near):
+                inside[near] += other.contains(points[near])
+        if mode == "intersection":
+            values = (inside == len(others)).astype(np.float64)
+        elif quantity == "volume":
+            values = 1 / (inside + 1)
+        else:
+            values = (inside == 0).astype(np.float64)
+        total += values.sum()
+        squares += (values * values).sum()
+    return total, squares
+
+
+_STATE = None
+
+
+def _init_worker(state):
+    global _STATE
+    _STATE = state
+
+
+def _sample_in_worker(n, seed):
+    return sample_batch(*_STATE, n, seed)
+
+
+class Assembly:
+    """Набор деталей с оценкой объёма и площади их объединения и пересечения"""
+
+    def __init__(self, parts=()):
+        self.parts = list(parts)
+
+    def __len__(self):
+        return len(self.parts)
+
+    def add(self, shape, center=(0, 0, 0), direction=(1, 0, 0), **params):
+        part = Part(shape, center, direction, **params)
+        self.parts.append(part)
+        return part
+
+    def union_volume(self, **options):
+        return self.estimate("volume", "union", **options)
+
+    def intersection_volume(self, **options):
+        return self.estimate("volume", "intersection", **options)
+
+    def union_area(self, **options):
+        return self.estimate("area", "union", **options)
+
+    def intersection_area(self, **options):
+        return self.estimate("area", "intersection", **options)
+
+    def outside_common_box(self, part):
+        """Поверхность параллелепипеда part целиком вне общей части ограничивающих параллелепипедов"""
+        if part.shape not in ("Cube", "Parallelepiped"):
+            return False
+        low = np.max([p.low for p in self.parts], axis=0)
+        high = np.min([p.high for p in self.parts], axis=0)
+        return bool((part.low < low).all() and (part.high > high).all())
+
+    def estimate(self, quantity, mode, tolerance=DEFAULT_TOLERANCE, batch_size=DEFAULT_BATCH_SIZE,
+                 max_samples=DEFAULT_MAX_SAMPLES, workers=1, seed=None):
+        """Объём или площадь ("volume", "area") объединения или пересечения ("union", "intersection").
+
+        tolerance - допустимая относительная полуширина 95% интервала;
+        расчёт останавливается, как только она достигнута, или после max_samples точек.
+        """
+        if not self.parts:
+            return Estimate(0.0)
+        measures = np.array([getattr(part, quantity) for part in self.parts])
+        neighbors = bbox_overlaps(self.parts)
+        if mode == "union":
+            lonely = np.array([not len(n) for n in neighbors])
+            exact = measures[lonely].sum()
+            sources = np.flatnonzero(~lonely)
+        elif mode == "intersection":
+            if len(self.parts) == 1:
+                return Estimate(float(measures[0]))
+            if any(len(n) < len(self.parts) - 1 for n in neighbors):
+                # есть пара деталей, которые не могут пересекаться
+                return Estimate(0.0)
+            exact = 0.0
+            if quantity == "volume":
+                # для объёма достаточно точек самой маленькой детали
+                sources = np.array([np.argmin(measures)])
+            else:
+                sources = np.flatnonzero([not self.outside_common_box(part) for part in self.parts])
+        else:
+            raise ValueError(f"Неизвестный вид сборки: {mode}")
+        if not len(sources):
+            return Estimate(float(exact))
+
+        scale = measures[sources].sum()
+        state = (self.parts, neighbors, sources, measures[sources] / scale, quantity, mode)
+        seeds = np.random.SeedSequence(seed)
+        samples = 0
+        total = squares = 0.0
+        value = error = float(exact)
+        converged = False
+
+        executor = None
+        if workers > 1:
+            executor = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(state,))
+        try:
+            while samples < max_samples and not converged:
+                batch_seeds = seeds.spawn(max(workers, 1))
+                if executor is None:
+                    results = [sample_batch(*state, batch_size, batch_seeds[0])]
+                else:
+                    futures = [executor.submit(_sample_in_worker, batch_size, s) for s in batch_seeds]
+                    results = [future.result() for future in futures]
+                for batch_total, batch_squares in results:
+                    total += batch_total
+                    squares += batch_squares
+                    samples += batch_size
+                mean = total / samples
+                variance = max(squares / samples - mean * mean, 0.0)
+                value = exact + scale * mean
+                error = Z_95 * scale * np.sqrt(variance / samples)
+                # пока ни одна точка не попала, оценка 0 ничего не говорит о малом пересечении
+                converged = error <= tolerance * value if total else samples >= min(max_samples, EMPTY_SAMPLES)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        return Estimate(float(value), float(error), samples, bool(converged))
+
+
+def union_volume(parts, **options):
+    """Объём объединения деталей (Part)"""
+    return Assembly(parts).union_volume(**options)
+
+
+def intersection_volume(parts, **options):
+    """Объём пересечения деталей (Part)"""
+    return Assembly(parts).intersection_volume(**options)
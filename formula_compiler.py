@@ -0,0 +1,105 @@
+"""Компиляция описаний формул фигур в функции расчёта.
+
+Характеристики фигуры задаются выражениями над параметрами и общими
+подвыражениями, правила проверки - выражениями условия ошибки. По ним
+генерируется исходный текст функции, которая за один проход считает все
+запрошенные характеристики; общие подвыражения вычисляются один раз и
+только если нужны. Одна и та же функция строится в двух вариантах: для
+чисел (math) и для массивов NumPy. Скомпилированные функции кэшируются.
+"""
+import ast
+import math
+
+# имена функций, доступных в выражениях, не считаются зависимостями
+FUNCTIONS = ("sqrt", "hypot", "pi", "isfinite", "floor")
+
+_KERNELS = {}
+_RULES = {}
+_DEPENDENCIES = {}
+
+
+def names(expression):
+    """Имена переменных, используемых в выражении"""
+    return {node.id for node in ast.walk(ast.parse(expression, mode="eval"))
+            if isinstance(node, ast.Name) and node.id not in FUNCTIONS}
+
+
+def _namespace(vector):
+    if vector:
+        import numpy as np
+        return {"sqrt": np.sqrt, "hypot": np.hypot, "pi": np.pi, "isfinite": np.isfinite, "floor": np.floor}
+    return {"sqrt": math.sqrt, "hypot": math.hypot, "pi": math.pi, "isfinite": math.isfinite, "floor": math.floor}
+
+
+def _shared_order(shared, needed):
+    """Общие подвыражения, нужные для needed, в порядке объявления"""
+    wanted = set()
+    stack = [name for name in needed if name in shared]
+    while stack:
+        name = stack.pop()
+        if name not in wanted:
+            wanted.add(name)
+            stack.extend(n for n in names(shared[name]) if n in shared)
+    return [name for name in shared if name in wanted]
+
+
+def dependencies(spec, prop):
+    """Параметры, от которых зависит характеристика prop, с учётом общих подвыражений"""
+    key = (spec.name, prop)
+    params = _DEPENDENCIES.get(key)
+    if params is None:
+        used = names(spec.properties[prop])
+        for name in _shared_order(spec.shared, used):
+            used |= names(spec.shared[name])
+        params = _DEPENDENCIES[key] = tuple(name for name in spec.param_names if name in used)
+    return params
+
+
+def _build(name, args, body):
+    return f"def {name}({', '.join(args)}):\n" + "".join(f"    {line}\n" for line in body)
+
+
+def compile_kernel(spec, properties=None, vector=False):
+    """Функция (параметры) -> {характеристика: значение} для выбранных характеристик"""
+    properties = tuple(spec.properties if properties is None else properties)
+    key = (spec.name, properties, vector)
+    kernel = _KERNELS.get(key)
+    if kernel is None:
+        params = spec.param_names
+        used = set().union(*(names(spec.properties[prop]) for prop in properties))
+        body = [f"{name} = {spec.shared[name]}" for name in _shared_order(spec.shared, used)]
+        items = []
+        for prop in properties:
+            expression = spec.properties[prop]
+            # голый параметр копируется, чтобы столбец результата не был входным массивом
+            if expression in params:
+                expression = f"+{expression}"
+            items.append(f"{prop!r}: {expression}")
+        body.append("return {" + ", ".join(items) + "}")
+        kernel = _KERNELS[key] = _exec(_build("kernel", params, body), "kernel", vector)
+    return kernel
+
+
+def compile_rules(spec, vector=False):
+    """Проверка параметров по правилам spec.checks.
+
+    Для чисел функция бросает ValueError с текстом первого нарушенного
+    правила, для массивов возвращает пары (текст, маска нарушений).
+    """
+    key = (spec.name, vector)
+    check = _RULES.get(key)
+    if check is None:
+        if vector:
+            body = ["return [" + ", ".join(f"({message!r}, {condition})"
+                                           for condition, message in spec.checks) + "]"]
+        else:
+            body = [line for condition, message in spec.checks
+                    for line in (f"if {condition}:", f"    raise ValueError({message!r})")] or ["pass"]
+        check = _RULES[key] = _exec(_build("check", spec.param_names, body), "check", vector)
+    return check
+
+
+def _exec(source, name, vector):
+    namespace = _namespace(vector)
+    exec(compile(source, f"<formulas {name}>", "exec"), namespace)
+    return namespace[name]
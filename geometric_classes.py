@@ -1,10 +1,20 @@
 from PySide6.QtWidgets import (QLabel, QLineEdit, QGridLayout, QGraphicsItem, QGraphicsRectItem, QGraphicsEllipseItem,
-                               QGraphicsPolygonItem)
-from PySide6.QtGui import QDoubleValidator, QIntValidator
-from PySide6.QtCore import QPointF
-import pyvista as pv
-from math import sqrt, pow, pi
+                               QGraphicsPolygonItem, QPushButton, QFileDialog)
+from PySide6.QtGui import QDoubleValidator, QIntValidator, QPolygonF, QPen
+from PySide6.QtCore import QPointF, QRectF, Qt
+from dataclasses import fields
+from math import sqrt, pow, hypot
 import abc
+import os
+
+import numpy as np
+import shiboken6
+
+import geometry_core as core
+import mesh_import
+import polygon
+from mesh_cache import cached_mesh
+from timing import TIMINGS
 
 VALIDATOR = QDoubleValidator(0, 200, 2)
 VALIDATOR.setNotation(QDoubleValidator.StandardNotation)
@@ -13,27 +23,120 @@ VALIDATOR.setNotation(QDoubleValidator.StandardNotation)
 class Shape:
     """Создание прототипа фигуры"""
     title = "Фигура"
+    params_class = None
 
     def __init__(self, scene):
         """Создание виджета для отрисовки фигур"""
         self.scene = scene
+        # характеристики при текущих параметрах; сбрасываются сеттерами set_*
+        self.cache = None
+
+    @property
+    def params(self):
+        """Параметры фигуры для вычислительного ядра geometry_core"""
+        return self.params_class(**{f.name: getattr(self, f.name) for f in fields(self.params_class)})
 
     def get_area(self):
         """Получение площади фигуры"""
         pass
 
+    def invalidate(self):
+        """Сброс запомненных характеристик после изменения параметра"""
+        self.cache = None
+
+    def check(self, params):
+        """Проверка параметров; фигуры вне geometry_core переопределяют её"""
+        core.validate(params)
+
+    def evaluate(self, params, previous=None):
+        """Расчёт характеристик по параметрам; фигуры вне geometry_core переопределяют его.
+
+        previous - пара (параметры, результат) прошлого расчёта: пересчитываются
+        только характеристики, зависящие от изменившихся параметров.
+        """
+        if previous is None:
+            return core.evaluate(params)
+        return core.evaluate_changed(params, *previous)
+
+    def properties(self):
+        """Характеристики фигуры при текущих параметрах; считаются один раз до смены параметров"""
+        if self.cache is None:
+            with self.timed("formula"):
+                self.cache = self.evaluate(self.params)
+        return self.cache
+
+    def get_property(self, name):
+        return self.properties()[name]
+
+    def timed(self, stage):
+        """Замер этапа stage для панели производительности"""
+        return TIMINGS.measure(type(self).__name__, stage)
+
+    def read_params(self):
+        """Считывание параметров из полей ввода"""
+        with self.timed("parse"):
+            for field in fields(self.params_class):
+                text = getattr(self, f"{field.name}_edit").text()
+                if text != "":
+                    getattr(self, f"set_{field.name}")(field.type(text))
+
     def validate(self):
         """Проверка на соответствие свойствам фигуры"""
-        pass
+        with self.timed("validate"):
+            self.check(self.params)
 
-    @abc.abstractmethod
     def calculate(self):
         """Расчёт характеристик фигуры"""
-        return {"area": self.get_area()}
+        self.read_params()
+        self.validate()
+        self.draw()
+        return dict(self.properties())
+
+    def prepare(self):
+        """Считывание параметров в потоке GUI перед фоновым расчётом"""
+        self.read_params()
+        return self.params, self.draw_context()
+
+    def compute(self, job, token=None, previous=None):
+        """Проверка, расчёт и построение геометрии; может выполняться вне потока GUI"""
+        params, context = job
+        with self.timed("validate"):
+            self.check(params)
+        with self.timed("formula"):
+            result = self.evaluate(params, previous)
+        if token is not None:
+            token.check()
+        with self.timed("build"):
+            geometry = self.build(params, context)
+        return result, geometry
+
+    def draw_context(self):
+        """Данные потока GUI, нужные для построения геометрии"""
+        return None
 
     @abc.abstractmethod
+    def build(self, params, context):
+        """Построение геометрии фигуры; может выполняться вне потока GUI"""
+        pass
+
+    @abc.abstractmethod
+    def present(self, geometry):
+        """Вывод построенной геометрии на сцену в потоке GUI"""
+        pass
+
+    def render(self, geometry):
+        """Вывод геометрии на сцену с замером этапа render"""
+        with self.timed("render"):
+            self.present(geometry)
+
     def draw(self):
         """Отрисовка фигуры"""
+        with self.timed("build"):
+            geometry = self.build(self.params, self.draw_context())
+        self.render(geometry)
+
+    def clear(self):
+        """Скрытие фигуры на сцене"""
         pass
 
     @abc.abstractmethod
@@ -45,26 +148,31 @@ class Shape:
 class Shape2D(Shape):
     """Прототип плоской фигуры"""
     title = "Плоская фигура"
+    item_class = QGraphicsPolygonItem
+
+    def __init__(self, scene):
+        super().__init__(scene)
+        self.item = None
+
+    def get_item(self):
+        """Элемент сцены фигуры: создаётся один раз, дальше меняется только его геометрия"""
+        if self.item is None:
+            self.item = self.item_class()
+            self.item.setFlag(QGraphicsItem.ItemIsMovable, True)
+            self.item.setCacheMode(QGraphicsItem.DeviceCoordinateCache)
+            self.scene.addItem(self.item)
+        self.item.show()
+        return self.item
+
+    def clear(self):
+        if self.item is not None:
+            self.item.hide()
 
     @classmethod
     def get_perimeter(cls):
         """Получение периметра фигуры"""
         pass
 
-    def calculate(self) -> object:
-        """Расчёт характеристик фигуры"""
-        result = super().calculate()
-        result.update({"perimeter": self.get_perimeter()})
-        return result
-
-    def validate(self):
-        "Проверка на соответствие свойствам фигуры"
-        pass
-
-    def draw(self):
-        """Отрисовка фигуры"""
-        pass
-
     def get_params_layout(self):
         """Расположение параметров"""
         pass
@@ -79,20 +187,6 @@ class Shape3D(Shape):
         """Получение объёма фигуры"""
         pass
 
-    def calculate(self):
-        """Расчёт характеристик фигуры"""
-        result = super().calculate()
-        result.update({"volume": self.get_volume()})
-        return result
-
-    def validate(self):
-        "Проверка на соответствие свойствам фигуры"
-        pass
-
-    def draw(self):
-        """Отрисовка фигуры"""
-        pass
-
     def get_params_layout(self):
         """Расположение параметров"""
         pass
@@ -101,6 +195,8 @@ class Shape3D(Shape):
 class Rectangle(Shape2D):
 
     title = "Прямоугольник"
+    item_class = QGraphicsRectItem
+    params_class = core.RectangleParams
 
     def __init__(self, scene):
         super().__init__(scene)
@@ -109,39 +205,26 @@ class Rectangle(Shape2D):
 
     def set_a(self, a):
         self.a = a
+        self.invalidate()
 
     def set_b(self, b):
         self.b = b
+        self.invalidate()
 
     def get_perimeter(self):
-        return 2 * (self.a + self.b)
+        return self.get_property("perimeter")
 
     def get_area(self):
-        return self.a * self.b
+        return self.get_property("area")
 
     def get_diagonal(self):
-        return sqrt(self.a ** 2 + self.b ** 2)
-
-    def validate(self):
-        if self.a == 0 or self.b == 0:
-            raise ValueError("Параметры не могут быть 0")
+        return self.get_property("diagonal")
 
-    def calculate(self):
-        if self.a_edit.text() != "":
-            self.set_a(float(self.a_edit.text()))
-        if self.b_edit.text() != "":
-            self.set_b(float(self.b_edit.text()))
-        self.validate()
-        self.draw()
-        result = super().calculate()
-        result.update({'diagonal': self.get_diagonal()})
-        return result
+    def build(self, params, context):
+        return QRectF(0, 0, params.a, params.b)
 
-    def draw(self):
-        self.scene.clear()
-        rect_item = QGraphicsRectItem(0, 0, self.a, self.b)
-        rect_item.setFlag(QGraphicsItem.ItemIsMovable, True)
-        self.scene.addItem(rect_item)
+    def present(self, rect):
+        self.get_item().setRect(rect)
 
     def get_params_layout(self):
         grid_layout = QGridLayout()
@@ -166,6 +249,8 @@ class Rectangle(Shape2D):
 class Square(Shape2D):
 
     title = "Квадрат"
+    item_class = QGraphicsRectItem
+    params_class = core.SquareParams
 
     def __init__(self, scene):
         super().__init__(scene)
@@ -173,34 +258,22 @@ class Square(Shape2D):
 
     def set_a(self, a):
         self.a = a
+        self.invalidate()
 
     def get_perimeter(self):
-        return 4 * self.a
+        return self.get_property("perimeter")
 
     def get_area(self):
-        return pow(self.a, 2)
+        return self.get_property("area")
 
     def get_diagonal(self):
-        return self.a * sqrt(2)
+        return self.get_property("diagonal")
 
-    def validate(self):
-        if self.a == 0:
-            raise ValueError("Параметры не могут быть 0")
+    def build(self, params, context):
+        return QRectF(0, 0, params.a, params.a)
 
-    def calculate(self):
-        if self.a_edit.text() != "":
-            self.set_a(float(self.a_edit.text()))
-        self.validate()
-        self.draw()
-        result = super().calculate()
-        result.update({'diagonal': self.get_diagonal()})
-        return result
-
-    def draw(self):
-        self.scene.clear()
-        rect_item = QGraphicsRectItem(0, 0, self.a, self.a)
-        rect_item.setFlag(QGraphicsItem.ItemIsMovable, True)
-        self.scene.addItem(rect_item)
+    def present(self, rect):
+        self.get_item().setRect(rect)
 
     def get_params_layout(self):
         grid_layout = QGridLayout()
@@ -218,6 +291,8 @@ class Square(Shape2D):
 class Circle(Shape2D):
 
     title = "Круг"
+    item_class = QGraphicsEllipseItem
+    params_class = core.CircleParams
 
     def __init__(self, scene):
         super().__init__(scene)
@@ -225,34 +300,22 @@ class Circle(Shape2D):
 
     def set_r(self, r):
         self.r = r
+        self.invalidate()
 
     def get_diameter(self):
-        return self.r * 2
+        return self.get_property("diameter")
 
     def get_perimeter(self):
-        return 2 * pi * self.r
+        return self.get_property("perimeter")
 
     def get_area(self):
-        return pi * pow(self.r, 2)
+        return self.get_property("area")
 
-    def validate(self):
-        if self.r == 0:
-            raise ValueError("Параметры не могут быть 0")
+    def build(self, params, context):
+        return QRectF(0, 0, 2 * params.r, 2 * params.r)
 
-    def calculate(self):
-        if self.r_edit.text() != "":
-            self.set_r(float(self.r_edit.text()))
-        self.validate()
-        self.draw()
-        result = super().calculate()
-        result.update({'diameter': self.get_diameter()})
-        return result
-
-    def draw(self):
-        self.scene.clear()
-        circle_item = QGraphicsEllipseItem(0, 0, 2 * self.r, 2 * self.r)
-        circle_item.setFlag(QGraphicsItem.ItemIsMovable, True)
-        self.scene.addItem(circle_item)
+    def present(self, rect):
+        self.get_item().setRect(rect)
 
     def get_params_layout(self):
         grid_layout = QGridLayout()
@@ -271,6 +334,7 @@ class Circle(Shape2D):
 class Cube(Shape3D):
 
     title = "Куб"
+    params_class = core.CubeParams
 
     def __init__(self, scene):
         super().__init__(scene)
@@ -278,33 +342,23 @@ class Cube(Shape3D):
 
     def set_a(self, a):
         self.a = a
+        self.invalidate()
 
     def get_volume(self):
-        return pow(self.a, 3)
+        return self.get_property("volume")
 
     def get_area(self):
-        return 6 * pow(self.a, 2)
+        return self.get_property("area")
 
     def get_diagonal(self):
-        return self.a * sqrt(3)
-
-    def validate(self):
-        if self.a == 0:
-            raise ValueError("Параметры не могут быть 0")
+        return self.get_property("diagonal")
 
-    def calculate(self):
-        if self.a_edit.text() != "":
-            self.set_a(float(self.a_edit.text()))
-        self.validate()
-        self.draw()
-        result = super().calculate()
-        result.update({'diagonal': self.get_diagonal()})
-        return result
+    def build(self, params, context):
+        return cached_mesh("cube"), (params.a, params.a, params.a)
 
-    def draw(self):
-        self.scene.clear()
-        cube = pv.Cube(x_length=self.a, y_length=self.a, z_length=self.a)
-        self.scene.addItem(cube, color="green", show_edges=True)
+    def present(self, geometry):
+        mesh, scale = geometry
+        self.scene.show_mesh("Cube", mesh, scale, color="green", show_edges=True)
 
     def get_params_layout(self):
         grid_layout = QGridLayout()
@@ -322,6 +376,7 @@ class Cube(Shape3D):
 class Sphere(Shape3D):
 
     title = "Сфера"
+    params_class = core.SphereParams
 
     def __init__(self, scene):
         super().__init__(scene)
@@ -329,29 +384,24 @@ class Sphere(Shape3D):
 
     def set_r(self, r):
         self.r = r
+        self.invalidate()
 
     def get_volume(self):
-        return 4 * pi * pow(self.r, 3) / 3
+        return self.get_property("volume")
 
     def get_area(self):
-        return 4 * pi * pow(self.r, 2)
+        return self.get_property("area")
 
-    def validate(self):
-        if self.r == 0:
-            raise ValueError("Параметры не могут быть 0")
+    def draw_context(self):
+        return self.scene.lod_resolution("sphere", self.r)
 
-    def calculate(self):
-        if self.r_edit.text() != "":
-            self.set_r(float(self.r_edit.text()))
-        self.validate()
-        self.draw()
-        result = super().calculate()
-        return result
+    def build(self, params, resolution):
+        return cached_mesh("sphere", radius=1, **resolution), params.r
 
-    def draw(self):
-        self.scene.clear()
-        sphere = pv.Sphere(radius=self.r)
-        self.scene.addItem(sphere, color="green", show_edges=True)
+    def present(self, geometry):
+        mesh, r = geometry
+        self.scene.show_lod("Sphere", "sphere", r, {"radius": 1}, (r, r, r), mesh=mesh,
+                            color="green", show_edges=True)
 
     def get_params_layout(self):
         grid_layout = QGridLayout()
@@ -369,6 +419,7 @@ class Sphere(Shape3D):
 class Rhombus(Shape2D):
 
     title = 'Ромб'
+    params_class = core.RhombusParams
 
     def __init__(self, scene):
         super().__init__(scene)
@@ -377,39 +428,25 @@ class Rhombus(Shape2D):
 
     def set_a(self, a):
         self.a = a
+        self.invalidate()
 
     def set_h(self, h):
         self.h = h
+        self.invalidate()
 
     def get_area(self):
-        return self.a * self.h
+        return self.get_property("area")
 
     def get_perimeter(self):
-        return self.a * 4
+        return self.get_property("perimeter")
 
-    def validate(self):
-        if self.a == 0 or self.h == 0:
-            raise ValueError("Параметры не могут быть 0")
-        if self.h >= self.a:
-            raise ValueError("Высота должна быть меньше стороны")
+    def build(self, params, context):
+        a, h = params.a, params.h
+        x = sqrt(pow(a, 2) - pow(h, 2))
+        return [QPointF(0, 0), QPointF(x, h), QPointF(a + x, h), QPointF(a, 0), QPointF(0, 0)]
 
-    def calculate(self):
-        if self.a_edit.text() != "":
-            self.set_a(float(self.a_edit.text()))
-        if self.h_edit.text() != "":
-            self.set_h(float(self.h_edit.text()))
-        self.validate()
-        self.draw()
-        result = super().calculate()
-        return result
-
-    def draw(self):
-        self.scene.clear()
-        x = sqrt(pow(self.a, 2) - pow(self.h, 2))
-        points = [QPointF(0, 0), QPointF(x, self.h), QPointF(self.a + x, self.h), QPointF(self.a, 0), QPointF(0, 0)]
-        rhombus_item = QGraphicsPolygonItem(points)
-        rhombus_item.setFlag(QGraphicsItem.ItemIsMovable, True)
-        self.scene.addItem(rhombus_item)
+    def present(self, points):
+        self.get_item().setPolygon(QPolygonF(points))
 
     def get_params_layout(self):
         grid_layout = QGridLayout()
@@ -434,6 +471,7 @@ class Rhombus(Shape2D):
 class Cylinder(Shape3D):
 
     title = "Цилиндр"
+    params_class = core.CylinderParams
 
     def __init__(self, scene):
         super().__init__(scene)
@@ -442,34 +480,28 @@ class Cylinder(Shape3D):
 
     def set_r(self, r):
         self.r = r
+        self.invalidate()
 
     def set_h(self, h):
         self.h = h
+        self.invalidate()
 
     def get_volume(self):
-        return pi * pow(self.r, 2) * self.h
+        return self.get_property("volume")
 
     def get_area(self):
-        return 2 * pi * pow(self.r, 2) + 2 * pi * self.r * self.h
+        return self.get_property("area")
 
-    def validate(self):
-        if self.r == 0 or self.h == 0:
-            raise ValueError("Параметры не могут быть 0")
+    def draw_context(self):
+        return self.scene.lod_resolution("cylinder", hypot(self.r, self.h / 2))
 
-    def calculate(self):
-        if self.r_edit.text() != "":
-            self.set_r(float(self.r_edit.text()))
-        if self.h_edit.text() != "":
-            self.set_h(float(self.h_edit.text()))
-        self.validate()
-        self.draw()
-        result = super().calculate()
-        return result
+    def build(self, params, resolution):
+        return cached_mesh("cylinder", radius=params.r, height=params.h, **resolution), params
 
-    def draw(self):
-        self.scene.clear()
-        cylinder = pv.Cylinder(radius=self.r, height=self.h)
-        self.scene.addItem(cylinder, color="green", show_edges=True)
+    def present(self, geometry):
+        mesh, params = geometry
+        self.scene.show_lod("Cylinder", "cylinder", hypot(params.r, params.h / 2),
+                            {"radius": params.r, "height": params.h}, mesh=mesh, color="green", show_edges=True)
 
     def get_params_layout(self):
         grid_layout = QGridLayout()
@@ -494,6 +526,7 @@ class Cylinder(Shape3D):
 class Cone(Shape3D):
 
     title = "Конус"
+    params_class = core.ConeParams
 
     def __init__(self, scene):
         super().__init__(scene)
@@ -502,35 +535,28 @@ class Cone(Shape3D):
 
     def set_r(self, r):
         self.r = r
+        self.invalidate()
 
     def set_h(self, h):
         self.h = h
+        self.invalidate()
 
     def get_volume(self):
-        c_l = sqrt(self.r ** 2 + self.h ** 2)
-        return pi * pow(self.r, 2) + pi * self.r * c_l
+        return self.get_property("volume")
 
     def get_area(self):
-        return pi * pow(self.r, 2) * self.h / 3
+        return self.get_property("area")
 
-    def validate(self):
-        if self.r == 0 or self.h == 0:
-            raise ValueError("Параметры не могут быть 0")
+    def draw_context(self):
+        return self.scene.lod_resolution("cone", hypot(self.r, self.h / 2))
 
-    def calculate(self):
-        if self.r_edit.text() != "":
-            self.set_r(float(self.r_edit.text()))
-        if self.h_edit.text() != "":
-            self.set_h(float(self.h_edit.text()))
-        self.validate()
-        self.draw()
-        result = super().calculate()
-        return result
+    def build(self, params, resolution):
+        return cached_mesh("cone", radius=params.r, height=params.h, **resolution), params
 
-    def draw(self):
-        self.scene.clear()
-        cone = pv.Cone(radius=self.r, height=self.h, resolution=20)
-        self.scene.addItem(cone, color="green", show_edges=True)
+    def present(self, geometry):
+        mesh, params = geometry
+        self.scene.show_lod("Cone", "cone", hypot(params.r, params.h / 2),
+                            {"radius": params.r, "height": params.h}, mesh=mesh, color="green", show_edges=True)
 
     def get_params_layout(self):
         grid_layout = QGridLayout()
@@ -555,6 +581,7 @@ class Cone(Shape3D):
 class Triangle(Shape2D):
 
     title = "Треугольник"
+    params_class = core.TriangleParams
 
     def __init__(self, scene):
         super().__init__(scene)
@@ -564,55 +591,36 @@ class Triangle(Shape2D):
 
     def set_a(self, a):
         self.a = a
+        self.invalidate()
 
     def set_b(self, b):
         self.b = b
+        self.invalidate()
 
     def set_c(self, c):
         self.c = c
+        self.invalidate()
 
     def get_perimeter(self):
-        return self.a + self.b + self.c
+        return self.get_property("perimeter")
 
     def get_area(self):
-        p = self.get_perimeter() / 2
-        height = 2 * sqrt(p * (p - self.a) * (p - self.b) * (p - self.c)) / self.b
-        return height * self.b / 2
+        return self.get_property("area")
 
     def get_median(self):
-        return 1 / 2 * sqrt(2 * self.a ** 2 + 2 * self.b ** 2 - self.c ** 2)
-
-    def validate(self):
-        if self.a == 0 or self.b == 0 or self.c == 0:
-            raise ValueError("Параметры не могут быть 0")
-        if self.a + self.b <= self.c \
-                or self.a + self.c <= self.b \
-                or self.b + self.c <= self.a:
-            raise ValueError("Данные не соответствуют свойствам треугольника")
+        return self.get_property("median")
 
-    def calculate(self):
-        if self.a_edit.text() != "":
-            self.set_a(float(self.a_edit.text()))
-        if self.b_edit.text() != "":
-            self.set_b(float(self.b_edit.text()))
-        if self.c_edit.text() != "":
-            self.set_c(float(self.c_edit.text()))
-        self.validate()
-        self.draw()
-        result = super().calculate()
-        result.update({'median': self.get_median()})
-        return result
-
-    def draw(self):
-        self.scene.clear()
-        points = [QPointF(0, 0), QPointF(self.a, 0)]
-        x3 = (pow(self.a, 2) + pow(self.b, 2) - pow(self.c, 2)) / (2 * self.a)
-        y3 = -sqrt(pow(self.b, 2) - pow(x3, 2))
+    def build(self, params, context):
+        a, b, c = params.a, params.b, params.c
+        points = [QPointF(0, 0), QPointF(a, 0)]
+        x3 = (pow(a, 2) + pow(b, 2) - pow(c, 2)) / (2 * a)
+        y3 = -sqrt(pow(b, 2) - pow(x3, 2))
         points.append(QPointF(x3, y3))
         points.append(QPointF(0, 0))
-        triangle_item = QGraphicsPolygonItem(points)
-        triangle_item.setFlag(QGraphicsItem.ItemIsMovable, True)
-        self.scene.addItem(triangle_item)
+        return points
+
+    def present(self, points):
+        self.get_item().setPolygon(QPolygonF(points))
 
     def get_params_layout(self):
         grid_layout = QGridLayout()
@@ -644,6 +652,7 @@ class Triangle(Shape2D):
 class Parallelepiped(Shape3D):
 
     title = "Параллелепипед"
+    params_class = core.ParallelepipedParams
 
     def __init__(self, scene):
         super().__init__(scene)
@@ -653,43 +662,31 @@ class Parallelepiped(Shape3D):
 
     def set_a(self, a):
         self.a = a
+        self.invalidate()
 
     def set_b(self, b):
         self.b = b
+        self.invalidate()
 
     def set_c(self, c):
         self.c = c
+        self.invalidate()
 
     def get_volume(self):
-        return self.a * self.b * self.c
+        return self.get_property("volume")
 
     def get_area(self):
-        return 2 * (self.a * self.b + self.b * self.c + self.a * self.c)
+        return self.get_property("area")
 
     def get_diagonal(self):
-        return sqrt(self.a ** 2 + self.b ** 2 + self.c ** 2)
+        return self.get_property("diagonal")
 
-    def validate(self):
-        if self.a == 0:
-            raise ValueError("Параметры не могут быть 0")
-
-    def calculate(self):
-        if self.a_edit.text() != "":
-            self.set_a(float(self.a_edit.text()))
-        if self.b_edit.text() != "":
-            self.set_b(float(self.b_edit.text()))
-        if self.c_edit.text() != "":
-            self.set_c(float(self.c_edit.text()))
-        self.validate()
-        self.draw()
-        result = super().calculate()
-        result.update({'diagonal': self.get_diagonal()})
-        return result
+    def build(self, params, context):
+        return cached_mesh("cube"), (params.a, params.b, params.c)
 
-    def draw(self):
-        self.scene.clear()
-        parallelepiped = pv.Cube(x_length=self.a, y_length=self.b, z_length=self.c)
-        self.scene.addItem(parallelepiped, color="green", show_edges=True)
+    def present(self, geometry):
+        mesh, scale = geometry
+        self.scene.show_mesh("Parallelepiped", mesh, scale, color="green", show_edges=True)
 
     def get_params_layout(self):
         grid_layout = QGridLayout()
@@ -721,6 +718,7 @@ class Parallelepiped(Shape3D):
 class Pyramid(Shape3D):
 
     title = "Пирамида"
+    params_class = core.PyramidParams
 
     def __init__(self, scene):
         super().__init__(scene)
@@ -730,48 +728,27 @@ class Pyramid(Shape3D):
 
     def set_a(self, a):
         self.a = a
+        self.invalidate()
 
     def set_h(self, h):
         self.h = h
+        self.invalidate()
 
     def set_n(self, n):
         self.n = n
+        self.invalidate()
 
     def get_volume(self):
-        x = sqrt(pow(self.a, 2) - pow(self.a / 2, 2))
-        p = self.a * self.n
-        S = p * x / 2
-        return S * self.h / 3
+        return self.get_property("volume")
 
     def get_area(self):
-        x = sqrt(pow(self.a, 2) - pow(self.a / 2, 2))
-        p = self.a * self.n
-        S1 = p * x / 2
-        x2 = pow(self.a, 2) + pow(self.h, 2)
-        h = sqrt(x2 - pow(self.a / 2, 2))
-        S2 = self.a * h / 2
-        return S1 + self.n * S2
-
-    def validate(self):
-        if self.a == 0 or self.h == 0 or self.n == 0:
-            raise ValueError("Параметры не могут быть 0")
+        return self.get_property("area")
 
-    def calculate(self):
-        if self.a_edit.text() != "":
-            self.set_a(float(self.a_edit.text()))
-        if self.h_edit.text() != "":
-            self.set_h(float(self.h_edit.text()))
-        if self.n_edit.text() != "":
-            self.set_n(int(self.n_edit.text()))
-        self.validate()
-        self.draw()
-        result = super().calculate()
-        return result
+    def build(self, params, context):
+        return cached_mesh("cone", radius=params.a, height=params.h, resolution=params.n)
 
-    def draw(self):
-        self.scene.clear()
-        cone = pv.Cone(radius=self.a, height=self.h, resolution=self.n)
-        self.scene.addItem(cone, color="green", show_edges=True)
+    def present(self, cone):
+        self.scene.show_mesh("Pyramid", cone, color="green", show_edges=True)
 
     def get_params_layout(self):
         grid_layout = QGridLayout()
@@ -798,3 +775,192 @@ class Pyramid(Shape3D):
         grid_layout.addWidget(self.n_edit, 2, 1)
 
         return grid_layout
+
+
+class Mesh(Shape3D):
+    """Треугольная сетка из файла STL, OBJ или PLY"""
+
+    title = "Сетка из файла"
+    params_class = mesh_import.MeshParams
+
+    def __init__(self, scene):
+        super().__init__(scene)
+        self.path = ""
+        # последняя загруженная сетка: ((путь, время изменения), точки, грани)
+        self.loaded = None
+
+    def set_path(self, path):
+        self.path = path
+        self.invalidate()
+
+    def load(self, path):
+        """Точки и грани файла path; файл перечитывается только после изменения"""
+        mesh_import.validate_mesh(path)
+        key = (path, os.path.getmtime(path))
+        loaded = self.loaded
+        if loaded is None or loaded[0] != key:
+            loaded = self.loaded = (key, *mesh_import.load_mesh(path))
+        return loaded[1], loaded[2]
+
+    def check(self, params):
+        mesh_import.validate_mesh(params.path)
+
+    def evaluate(self, params, previous=None):
+        return mesh_import.mesh_properties(*self.load(params.path))
+
+    def get_volume(self):
+        return self.get_property("volume")
+
+    def get_area(self):
+        return self.get_property("area")
+
+    def get_diagonal(self):
+        return self.get_property("diagonal")
+
+    def build(self, params, context):
+        return mesh_import.to_polydata(*self.load(params.path))
+
+    def present(self, mesh):
+        # сетка не из общего кэша, поэтому актёр рисует её массивы без копии
+        self.scene.show_mesh("Mesh", mesh, copy=False, color="lightgray")
+
+    def choose_file(self):
+        path, _ = QFileDialog.getOpenFileName(None, "Открыть сетку", os.path.dirname(self.path_edit.text()),
+                                              "Сетки (*.stl *.obj *.ply)")
+        if path:
+            self.path_edit.setText(path)
+            self.path_edit.textEdited.emit(path)
+
+    def get_params_layout(self):
+        grid_layout = QGridLayout()
+
+        path_label = QLabel("Файл:")
+        self.path_edit = QLineEdit()
+        self.path_edit.setPlaceholderText("*.stl, *.obj, *.ply")
+        open_btn = QPushButton("...")
+        open_btn.clicked.connect(self.choose_file)
+        grid_layout.addWidget(path_label, 0, 0)
+        grid_layout.addWidget(self.path_edit, 0, 1)
+        grid_layout.addWidget(open_btn, 0, 2)
+
+        return grid_layout
+
+
+def polygon_from_array(points):
+    """QPolygonF из массива вершин (n, 2): координаты копируются в буфер многоугольника без цикла по точкам"""
+    outline = QPolygonF()
+    outline.resize(len(points))
+    if len(points):
+        # QPointF хранит два double подряд, как строка массива float64
+        buffer = shiboken6.VoidPtr(outline.data(), 16 * len(points), True)
+        np.frombuffer(buffer, dtype=np.float64)[:] = np.ravel(points)
+    return outline
+
+
+class PolygonItem(QGraphicsItem):
+    """Контур многоугольника, прореживаемый под текущий масштаб вида"""
+
+    def __init__(self):
+        super().__init__()
+        self.points = np.empty((0, 2))
+        self.rect = QRectF()
+        # прореженные контуры по уровню масштаба (шаг сетки 2 ** level)
+        self.simplified = {}
+        self.pen = QPen(Qt.black, 0)
+        # без этого флага option.exposedRect всегда равен boundingRect
+        self.setFlag(QGraphicsItem.ItemUsesExtendedStyleOption, True)
+
+    def set_points(self, points):
+        self.prepareGeometryChange()
+        self.points = points
+        self.simplified = {}
+        (xmin, ymin), (xmax, ymax) = points.min(axis=0), points.max(axis=0)
+        self.rect = QRectF(xmin, ymin, xmax - xmin, ymax - ymin)
+        self.update()
+
+    def boundingRect(self):
+        return self.rect
+
+    def paint(self, painter, option, widget=None):
+        if not option.exposedRect.intersects(self.rect):
+            return
+        lod = option.levelOfDetailFromTransform(painter.worldTransform())
+        # шаг прореживания - степень двойки около пикселя: контур пересобирается скачками, а не на каждом шаге зума
+        level = int(np.floor(np.log2(1 / lod))) if lod > 0 else 0
+        outline = self.simplified.get(level)
+        if outline is None:
+            points = polygon.simplify(self.points, 2.0 ** level)
+            outline = self.simplified[level] = polygon_from_array(points)
+        painter.setPen(self.pen)
+        painter.drawPolygon(outline)
+
+
+class Polygon(Shape2D):
+    """Многоугольник с произвольным числом вершин"""
+
+    title = "Многоугольник"
+    item_class = PolygonItem
+    params_class = polygon.PolygonParams
+
+    def __init__(self, scene):
+        super().__init__(scene)
+        self.vertices = ""
+        # последние разобранные вершины: (текст параметра, массив (n, 2))
+        self.loaded = None
+
+    def set_vertices(self, vertices):
+        self.vertices = vertices
+        self.invalidate()
+
+    def load(self, vertices):
+        """Массив вершин по тексту параметра; разбирается заново только после изменения"""
+        loaded = self.loaded
+        if loaded is None or loaded[0] != vertices:
+            loaded = self.loaded = (vertices, polygon.load_vertices(vertices))
+        return loaded[1]
+
+    def check(self, params):
+        polygon.validate_polygon(self.load(params.vertices))
+
+    def evaluate(self, params, previous=None):
+        return polygon.polygon_properties(self.load(params.vertices))
+
+    def get_perimeter(self):
+        return self.get_property("perimeter")
+
+    def get_area(self):
+        return self.get_property("area")
+
+    def build(self, params, context):
+        return self.load(params.vertices)
+
+    def present(self, points):
+        self.get_item().set_points(points)
+
+    def choose_file(self):
+        path, _ = QFileDialog.getOpenFileName(None, "Открыть вершины", "", "Вершины (*.npy *.csv *.txt)")
+        if path:
+            self.vertices_edit.setText(path)
+            self.vertices_edit.textEdited.emit(path)
+
+    def get_params_layout(self):
+        grid_layout = QGridLayout()
+
+        vertices_label = QLabel("Вершины:")
+        self.vertices_edit = QLineEdit()
+        self.vertices_edit.setPlaceholderText("0 0; 4 0; 4 3 или файл")
+        open_btn = QPushButton("...")
+        open_btn.clicked.connect(self.choose_file)
+        grid_layout.addWidget(vertices_label, 0, 0)
+        grid_layout.addWidget(self.vertices_edit, 0, 1)
+        grid_layout.addWidget(open_btn, 0, 2)
+
+        return grid_layout
+
+
+# Реестр фигур в порядке списка выбора; ключ - имя фигуры в geometry_core.SHAPES
+SHAPES = {core.get_spec(cls.params_class).name: cls for cls in (
+    Triangle, Rectangle, Square, Circle, Cube, Sphere, Rhombus, Cylinder, Cone, Parallelepiped, Pyramid)}
+# многоугольники и сетки из файлов не описываются формулами geometry_core
+SHAPES["Polygon"] = Polygon
+SHAPES["Mesh"] = Mesh
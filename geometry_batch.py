@@ -0,0 +1,121 @@
+"""Пакетный расчёт характеристик фигур на массивах NumPy.
+
+Каждая функция *_batch принимает массивы параметров одинаковой длины и
+возвращает BatchResult со столбцами характеристик. Формулы и правила
+проверки берутся из описаний ShapeSpec в варианте для массивов NumPy:
+некорректные строки не прерывают расчёт, а попадают в invalid_rows с
+текстом ошибки.
+"""
+from dataclasses import fields
+
+import numpy as np
+
+import geometry_core as core
+
+
+class BatchResult:
+    """Результат пакетного расчёта одной фигуры"""
+
+    def __init__(self, shape, columns, error_codes, messages):
+        self.shape = shape
+        self.columns = columns
+        self.error_codes = error_codes
+        self.messages = messages
+
+    def __len__(self):
+        return len(self.error_codes)
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    @property
+    def valid(self):
+        """Маска строк, прошедших проверку"""
+        return self.error_codes == 0
+
+    @property
+    def invalid_rows(self):
+        """Индексы строк, не прошедших проверку"""
+        return np.flatnonzero(self.error_codes)
+
+    def errors(self):
+        """Пары (индекс строки, текст ошибки) для некорректных строк"""
+        rows = self.invalid_rows
+        return [(int(i), self.messages[code - 1]) for i, code in zip(rows, self.error_codes[rows])]
+
+
+def param_names(shape):
+    """Имена параметров фигуры в порядке объявления"""
+    return [f.name for f in fields(core.get_spec(shape).params)]
+
+
+def calculate_batch(shape, properties=None, **params):
+    """Пакетный расчёт характеристик фигуры по массивам параметров.
+
+    properties - имена нужных характеристик; по умолчанию считаются все.
+    """
+    names = param_names(shape)
+    missing = set(names) - params.keys()
+    if missing:
+        raise ValueError(f"Не заданы параметры: {', '.join(sorted(missing))}")
+    arrays = np.broadcast_arrays(*(np.asarray(params[name], dtype=np.float64) for name in names))
+    arrays = [np.ravel(arr) for arr in arrays]
+    spec = core.get_spec(shape)
+
+    error_codes = np.zeros(len(arrays[0]), dtype=np.int8)
+    messages = []
+    for message, bad in spec.check(vector=True)(*arrays):
+        messages.append(message)
+        error_codes[bad & (error_codes == 0)] = len(messages)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        columns = spec.kernel(properties, vector=True)(*arrays)
+    if error_codes.any():
+        invalid = error_codes != 0
+        for column in columns.values():
+            column[invalid] = np.nan
+    return BatchResult(shape, columns, error_codes, messages)
+
+
+def triangle_batch(a, b, c):
+    return calculate_batch("Triangle", a=a, b=b, c=c)
+
+
+def rectangle_batch(a, b):
+    return calculate_batch("Rectangle", a=a, b=b)
+
+
+def square_batch(a):
+    return calculate_batch("Square", a=a)
+
+
+def circle_batch(r):
+    return calculate_batch("Circle", r=r)
+
+
+def rhombus_batch(a, h):
+    return calculate_batch("Rhombus", a=a, h=h)
+
+
+def cube_batch(a):
+    return calculate_batch("Cube", a=a)
+
+
+def sphere_batch(r):
+    return calculate_batch("Sphere", r=r)
+
+
+def cylinder_batch(r, h):
+    return calculate_batch("Cylinder", r=r, h=h)
+
+
+def cone_batch(r, h):
+    return calculate_batch("Cone", r=r, h=h)
+
+
+def parallelepiped_batch(a, b, c):
+    return calculate_batch("Parallelepiped", a=a, b=b, c=c)
+
+
+def pyramid_batch(a, h, n):
+    return calculate_batch("Pyramid", a=a, h=h, n=n)
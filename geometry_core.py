@@ -0,0 +1,302 @@
+"""Вычислительное ядро геометрических фигур.
+
+Модуль не зависит от PySide6 и pyvista: параметры фигур хранятся в лёгких
+объектах, а формулы и правила проверки описаны выражениями в ShapeSpec и
+компилируются formula_compiler в функции для чисел и массивов NumPy.
+Классы из geometric_classes оборачивают это ядро для графического интерфейса.
+"""
+from collections import OrderedDict
+from dataclasses import dataclass, field, fields
+from threading import Lock
+
+import formula_compiler
+
+ZERO_ERROR = "Параметры не могут быть 0"
+TRIANGLE_ERROR = "Данные не соответствуют свойствам треугольника"
+RHOMBUS_ERROR = "Высота должна быть меньше стороны"
+FINITE_ERROR = "Параметр должен быть конечным числом"
+INTEGER_ERROR = "Параметр должен быть целым числом"
+FACES_ERROR = "Число граней должно быть не меньше 3"
+DEFAULT_CACHE_ENTRIES = 4096
+
+
+@dataclass
+class TriangleParams:
+    """Параметры треугольника"""
+    a: float = 0
+    b: float = 0
+    c: float = 0
+
+
+@dataclass
+class RectangleParams:
+    """Параметры прямоугольника"""
+    a: float = 0
+    b: float = 0
+
+
+@dataclass
+class SquareParams:
+    """Параметры квадрата"""
+    a: float = 0
+
+
+@dataclass
+class CircleParams:
+    """Параметры круга"""
+    r: float = 0
+
+
+@dataclass
+class RhombusParams:
+    """Параметры ромба"""
+    a: float = 0
+    h: float = 0
+
+
+@dataclass
+class CubeParams:
+    """Параметры куба"""
+    a: float = 0
+
+
+@dataclass
+class SphereParams:
+    """Параметры сферы"""
+    r: float = 0
+
+
+@dataclass
+class CylinderParams:
+    """Параметры цилиндра"""
+    r: float = 0
+    h: float = 0
+
+
+@dataclass
+class ConeParams:
+    """Параметры конуса"""
+    r: float = 0
+    h: float = 0
+
+
+@dataclass
+class ParallelepipedParams:
+    """Параметры параллелепипеда"""
+    a: float = 0
+    b: float = 0
+    c: float = 0
+
+
+@dataclass
+class PyramidParams:
+    """Параметры правильной пирамиды"""
+    a: float = 0
+    h: float = 0
+    n: int = 0
+
+
+def finite(*names):
+    """Правило: все параметры names - конечные числа"""
+    return " | ".join(f"(isfinite({name}) == 0)" for name in names), FINITE_ERROR
+
+
+def integer(*names):
+    """Правило: параметры names не имеют дробной части"""
+    return " | ".join(f"(floor({name}) != {name})" for name in names), INTEGER_ERROR
+
+
+def nonzero(*names):
+    """Правило: ни один из параметров names не равен 0"""
+    return " | ".join(f"({name} == 0)" for name in names), ZERO_ERROR
+
+
+@dataclass(frozen=True)
+class ShapeSpec:
+    """Описание фигуры: параметры, правила проверки и формулы характеристик.
+
+    Правила - пары (условие ошибки, сообщение), проверяются по порядку.
+    Характеристики и общие подвыражения shared - выражения над параметрами
+    с функциями sqrt, hypot, isfinite, floor и константой pi. Условия записываются через
+    | и &, чтобы одинаково работать для чисел и массивов NumPy. По описанию
+    formula_compiler строит функции расчёта для чисел и для массивов.
+    """
+    name: str
+    params: type
+    rules: tuple
+    properties: dict
+    shared: dict = field(default_factory=dict)
+
+    @property
+    def param_names(self):
+        return tuple(f.name for f in fields(self.params))
+
+    @property
+    def checks(self):
+        """Правила вместе с общими для всех фигур: параметры конечны, целые поля - целые числа"""
+        rules = [finite(*self.param_names)]
+        integers = [f.name for f in fields(self.params) if f.type is int]
+        if integers:
+            rules.append(integer(*integers))
+        return tuple(rules) + self.rules
+
+    def dependencies(self, prop):
+        """Параметры, от которых зависит характеристика prop"""
+        return formula_compiler.dependencies(self, prop)
+
+    def kernel(self, properties=None, vector=False):
+        """Функция расчёта характеристик properties (по умолчанию всех) за один проход"""
+        return formula_compiler.compile_kernel(self, properties, vector)
+
+    def check(self, vector=False):
+        """Функция проверки параметров"""
+        return formula_compiler.compile_rules(self, vector)
+
+
+SHAPES = {spec.name: spec for spec in (
+    ShapeSpec("Triangle", TriangleParams,
+              (nonzero("a", "b", "c"), ("(a + b <= c) | (a + c <= b) | (b + c <= a)", TRIANGLE_ERROR)),
+              {"area": "sqrt(p * (p - a) * (p - b) * (p - c))", "perimeter": "2 * p",
+               "median": "0.5 * sqrt(2 * a * a + 2 * b * b - c * c)"},
+              {"p": "(a + b + c) / 2"}),
+    ShapeSpec("Rectangle", RectangleParams, (nonzero("a", "b"),),
+              {"area": "a * b", "perimeter": "2 * (a + b)", "diagonal": "hypot(a, b)"}),
+    ShapeSpec("Square", SquareParams, (nonzero("a"),),
+              {"area": "a * a", "perimeter": "4 * a", "diagonal": "a * sqrt(2)"}),
+    ShapeSpec("Circle", CircleParams, (nonzero("r"),),
+              {"area": "pi * r * r", "perimeter": "2 * pi * r", "diameter": "2 * r"}),
+    ShapeSpec("Rhombus", RhombusParams, (nonzero("a", "h"), ("h >= a", RHOMBUS_ERROR)),
+              {"area": "a * h", "perimeter": "4 * a"}),
+    ShapeSpec("Cube", CubeParams, (nonzero("a"),),
+              {"area": "6 * a2", "volume": "a2 * a", "diagonal": "a * sqrt(3)"},
+              {"a2": "a * a"}),
+    ShapeSpec("Sphere", SphereParams, (nonzero("r"),),
+              {"area": "surface", "volume": "surface * r / 3"},
+              {"surface": "4 * pi * r * r"}),
+    ShapeSpec("Cylinder", CylinderParams, (nonzero("r", "h"),),
+              {"area": "2 * base + 2 * pi * r * h", "volume": "base * h"},
+              {"base": "pi * r * r"}),
+    ShapeSpec("Cone", ConeParams, (nonzero("r", "h"),),
+              {"area": "base + pi * r * hypot(r, h)", "volume": "base * h / 3"},
+              {"base": "pi * r * r"}),
+    ShapeSpec("Parallelepiped", ParallelepipedParams, (nonzero("a", "b", "c"),),
+              {"area": "2 * (a * b + b * c + a * c)", "volume": "a * b * c",
+               "diagonal": "sqrt(a * a + b * b + c * c)"}),
+    ShapeSpec("Pyramid", PyramidParams, (nonzero("a", "h", "n"), ("n < 3", FACES_ERROR)),
+              {"area": "base + n * a * sqrt(a * a + h * h - half * half) / 2", "volume": "base * h / 3"},
+              {"half": "a / 2", "base": "a * n * sqrt(a * a - half * half) / 2"}),
+)}
+
+_SPECS_BY_PARAMS = {spec.params: spec for spec in SHAPES.values()}
+
+
+def get_spec(shape):
+    """Описание фигуры по имени, классу или объекту параметров"""
+    if isinstance(shape, str):
+        try:
+            return SHAPES[shape]
+        except KeyError:
+            raise ValueError(f"Неизвестная фигура: {shape}") from None
+    return _SPECS_BY_PARAMS[shape if isinstance(shape, type) else type(shape)]
+
+
+class ResultCache:
+    """Общий LRU-кэш словарей характеристик по ключу (фигура, параметры)"""
+
+    def __init__(self, max_entries=DEFAULT_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def lookup(self, key):
+        """Результат по ключу или None; учитывается в статистике"""
+        with self.lock:
+            result = self.entries.get(key)
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.entries.move_to_end(key)
+            return result
+
+    def store(self, key, result):
+        with self.lock:
+            self.entries[key] = result
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        """Счётчики попаданий и промахов"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+RESULT_CACHE = ResultCache()
+
+
+def _values(params):
+    # astuple копирует значения рекурсивно, а для ключа кэша достаточно плоского кортежа
+    return tuple(params.__dict__.values())
+
+
+def validate(params):
+    """Проверка параметров на соответствие свойствам фигуры"""
+    get_spec(params).check()(*_values(params))
+
+
+def evaluate(params):
+    """Расчёт характеристик без проверки параметров; повторные запросы берутся из RESULT_CACHE"""
+    spec = get_spec(params)
+    values = _values(params)
+    key = (spec.name, values)
+    result = RESULT_CACHE.lookup(key)
+    if result is None:
+        result = spec.kernel()(*values)
+        RESULT_CACHE.store(key, result)
+    # в кэше хранится исходный словарь, наружу отдаётся копия
+    return dict(result)
+
+
+def evaluate_changed(params, previous, result):
+    """Пересчёт только характеристик, зависящих от изменившихся параметров"""
+    spec = get_spec(params)
+    values = _values(params)
+    key = (spec.name, values)
+    cached = RESULT_CACHE.lookup(key)
+    if cached is not None:
+        return dict(cached)
+    changed = {f.name for f in fields(params) if getattr(params, f.name) != getattr(previous, f.name)}
+    stale = tuple(name for name in spec.properties if changed.intersection(spec.dependencies(name)))
+    updated = dict(result)
+    if stale:
+        updated.update(spec.kernel(stale)(*values))
+    RESULT_CACHE.store(key, dict(updated))
+    return updated
+
+
+def calculate(params):
+    """Проверка параметров и расчёт характеристик фигуры"""
+    validate(params)
+    return evaluate(params)
+
+
+def make_params(shape, **values):
+    """Создание объекта параметров по имени фигуры"""
+    return get_spec(shape).params(**values)
@@ -0,0 +1,116 @@
+"""Многопроцессный пакетный расчёт фигур.
+
+Большой пакет делится на блоки, которые считаются в пуле процессов.
+Входные и выходные массивы размещаются в разделяемой памяти: процессам
+передаются только имя сегмента и границы блока, поэтому большие массивы
+не сериализуются. Каждый блок пишет результат в свой диапазон строк,
+так что порядок результатов совпадает с порядком входных данных.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+import geometry_core as core
+from geometry_batch import BatchResult, calculate_batch, param_names
+
+DEFAULT_CHUNK_SIZE = 1_000_000
+
+
+class SharedArray:
+    """Двумерный массив float64 в разделяемой памяти"""
+
+    def __init__(self, shape, name=None):
+        self.shape = shape
+        size = max(int(np.prod(shape)) * 8, 1)
+        self.shm = SharedMemory(name=name, create=name is None, size=size)
+        self.array = np.ndarray(shape, dtype=np.float64, buffer=self.shm.buf)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def close(self):
+        del self.array
+        self.shm.close()
+
+    def unlink(self):
+        self.close()
+        self.shm.unlink()
+
+
+def _run_chunk(shape, inputs, outputs, start, stop):
+    """Расчёт блока строк [start, stop) внутри процесса пула"""
+    names = param_names(shape)
+    columns = list(core.get_spec(shape).properties)
+    src = SharedArray(*inputs)
+    dst = SharedArray(*outputs)
+    try:
+        params = {name: src.array[i, start:stop] for i, name in enumerate(names)}
+        result = calculate_batch(shape, **params)
+        for i, column in enumerate(columns):
+            dst.array[i, start:stop] = result.columns[column]
+        # последняя строка выходного массива - коды ошибок проверки
+        dst.array[-1, start:stop] = result.error_codes
+    finally:
+        src.close()
+        dst.close()
+
+
+class ParallelCalculator:
+    """Пул процессов для пакетного расчёта; пригоден для многократного использования"""
+
+    def __init__(self, workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.executor = ProcessPoolExecutor(max_workers=self.workers)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.executor.shutdown()
+
+    def calculate(self, shape, chunk_size=None, **params):
+        """Расчёт пакета фигуры shape по массивам параметров"""
+        chunk_size = chunk_size or self.chunk_size
+        if chunk_size <= 0:
+            raise ValueError("Размер блока должен быть положительным")
+        names = param_names(shape)
+        missing = set(names) - params.keys()
+        if missing:
+            raise ValueError(f"Не заданы параметры: {', '.join(sorted(missing))}")
+        arrays = np.broadcast_arrays(*(np.asarray(params[name], dtype=np.float64) for name in names))
+        arrays = [np.ravel(arr) for arr in arrays]
+        n = len(arrays[0])
+        columns = list(core.get_spec(shape).properties)
+        # пустой расчёт даёт тексты ошибок в том же порядке, что и у процессов пула
+        messages = calculate_batch(shape, **{name: np.empty(0) for name in names}).messages
+
+        src = SharedArray((len(names), n))
+        dst = SharedArray((len(columns) + 1, n))
+        try:
+            for i, arr in enumerate(arrays):
+                src.array[i] = arr
+            inputs = (src.shape, src.name)
+            outputs = (dst.shape, dst.name)
+            futures = [self.executor.submit(_run_chunk, shape, inputs, outputs, start, min(start + chunk_size, n))
+                       for start in range(0, n, chunk_size)]
+            for future in futures:
+                future.result()
+            result = {column: dst.array[i].copy() for i, column in enumerate(columns)}
+            error_codes = dst.array[-1].astype(np.int8)
+        finally:
+            src.unlink()
+            dst.unlink()
+        return BatchResult(shape, result, error_codes, messages)
+
+
+def calculate_parallel(shape, workers=None, chunk_size=DEFAULT_CHUNK_SIZE, **params):
+    """Разовый многопроцессный расчёт пакета фигуры shape"""
+    with ParallelCalculator(workers, chunk_size) as calculator:
+        return calculator.calculate(shape, **params)
@@ -1,34 +1,169 @@
+import sys
+
+# режимы командной строки запускаются до импорта Qt и классов фигур, им не нужна графическая среда
+if __name__ == '__main__' and len(sys.argv) > 1:
+    if sys.argv[1] == "batch":
+        import batch_io
+        sys.exit(batch_io.main(sys.argv[2:]))
+    if sys.argv[1] == "serve":
+        import calc_server
+        sys.exit(calc_server.main(sys.argv[2:]))
+    if sys.argv[1] == "snapshots":
+        import snapshot
+        sys.exit(snapshot.main(sys.argv[2:]))
+
 from PySide6.QtWidgets import (QApplication, QMainWindow, QComboBox, QLabel, QVBoxLayout, QHBoxLayout, QWidget,
                                QSpacerItem, QSizePolicy, QPushButton, QGraphicsView, QGraphicsScene, QMessageBox,
-                               QStackedWidget)
-import sys
+                               QStackedWidget, QCheckBox, QDockWidget, QTableWidget, QTableWidgetItem, QFileDialog)
+from PySide6.QtCore import QTimer, Qt
+from dataclasses import fields
 
-from view_3D import View3D
-from geometric_classes import (Rectangle, Square, Circle, Cube, Sphere, Triangle, Rhombus, Cylinder, Cone,
-                               Parallelepiped, Pyramid)
+from background import BackgroundRunner
+from geometric_classes import SHAPES, Shape3D
+from timing import TIMINGS
 
 
-class Window(QMainWindow):
+LIVE_DELAY_MS = 250
+TIMINGS_REFRESH_MS = 1000
+
+
+class ResultsView(QWidget):
+    """Результаты расчёта: по строке на характеристику, перерисовываются только изменившиеся"""
 
     def __init__(self):
+        super().__init__()
+        self.labels = {}
+        self.v_layout = QVBoxLayout()
+        self.v_layout.setContentsMargins(0, 0, 0, 0)
+        self.error_label = QLabel()
+        self.error_label.setStyleSheet("color: red")
+        self.error_label.setWordWrap(True)
+        self.error_label.hide()
+        self.v_layout.addWidget(self.error_label)
+        self.setLayout(self.v_layout)
+
+    def set_results(self, result):
+        self.error_label.hide()
+        for name in list(self.labels):
+            if name not in result:
+                self.labels.pop(name).deleteLater()
+        for name, value in result.items():
+            # признаки вроде выпуклости многоугольника выводятся словами, а не числом
+            text = f"{name} = {'да' if value else 'нет'}" if isinstance(value, bool) else f"{name} = {value:.2f}"
+            label = self.labels.get(name)
+            if label is None:
+                label = self.labels[name] = QLabel()
+                self.v_layout.insertWidget(len(self.labels) - 1, label)
+            if label.text() != text:
+                label.setText(text)
+
+    def set_error(self, message):
+        self.error_label.setText(message)
+        self.error_label.show()
+
+    def clear(self):
+        for label in self.labels.values():
+            label.deleteLater()
+        self.labels = {}
+        self.error_label.hide()
+
+    def text(self):
+        return "".join(label.text() + "\n" for label in self.labels.values())
+
+
+class TimingsPanel(QWidget):
+    """p50 и p95 времени этапов расчёта по фигурам; обновляется, пока панель видна"""
+    COLUMNS = ("Фигура", "Этап", "Замеров", "p50, мс", "p95, мс")
+
+    def __init__(self, timings=TIMINGS):
+        super().__init__()
+        self.timings = timings
+        v_layout = QVBoxLayout()
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.verticalHeader().hide()
+        v_layout.addWidget(self.table)
+        h_layout = QHBoxLayout()
+        clear_btn = QPushButton("Сбросить")
+        clear_btn.clicked.connect(self.clear)
+        h_layout.addWidget(clear_btn)
+        export_btn = QPushButton("Экспорт JSON")
+        export_btn.clicked.connect(self.export)
+        h_layout.addWidget(export_btn)
+        v_layout.addLayout(h_layout)
+        self.setLayout(v_layout)
+        self.timer = QTimer(self)
+        self.timer.setInterval(TIMINGS_REFRESH_MS)
+        self.timer.timeout.connect(self.refresh)
+
+    def showEvent(self, event):
+        self.refresh()
+        self.timer.start()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.timer.stop()
+        super().hideEvent(event)
+
+    def refresh(self):
+        rows = [(shape, stage, row) for shape, stages in self.timings.summary().items()
+                for stage, row in stages.items()]
+        self.table.setRowCount(len(rows))
+        for i, (shape, stage, row) in enumerate(rows):
+            values = (shape, stage, str(row["count"]), f"{row['p50'] * 1e3:.3f}", f"{row['p95'] * 1e3:.3f}")
+            for j, text in enumerate(values):
+                self.table.setItem(i, j, QTableWidgetItem(text))
+
+    def clear(self):
+        self.timings.clear()
+        self.refresh()
+
+    def export(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Экспорт замеров", "timings.json", "JSON (*.json)")
+        if path:
+            self.timings.export_json(path)
+
+
+class Window(QMainWindow):
+
+    def __init__(self, opengl=False):
         super().__init__()
         self.figure = None
+        # последний показанный расчёт (фигура, параметры, результат) для инкрементального пересчёта
+        self.last = None
+        # расчёт и построение сеток идут в пуле потоков, на сцену попадает только готовая геометрия
+        self.runner = BackgroundRunner(parent=self)
         self.setWindowTitle("Геометрический Калькулятор")
         self.init_window()
+        if opengl:
+            self.set_opengl_viewport(True)
 
     def init_window(self):
         h_layout = QHBoxLayout()
         v_layout = QVBoxLayout()
 
         self.figure_selector = QComboBox()
-        self.figure_selector.addItems(["", "Triangle", "Rectangle", "Square", "Circle", "Cube", "Sphere", "Rhombus",
-                                       "Cylinder", "Cone", "Parallelepiped", "Pyramid"])
+        self.figure_selector.addItems([""] + list(SHAPES))
         self.figure_selector.setMinimumWidth(200)
         self.figure_selector.currentIndexChanged.connect(self.figure_selected)
         v_layout.addWidget(self.figure_selector)
-        self.params_widget = QWidget()
-        v_layout.addWidget(self.params_widget)
-        self.results_label = QLabel()
+        # панели параметров создаются по одной на фигуру и сохраняют введённые значения
+        self.panels = {}
+        self.params_stack = QStackedWidget()
+        self.params_stack.addWidget(QWidget())
+        v_layout.addWidget(self.params_stack)
+        self.calc_btn = QPushButton("Calculate")
+        self.calc_btn.clicked.connect(lambda: self.calculate())
+        self.calc_btn.hide()
+        v_layout.addWidget(self.calc_btn)
+        self.live_check = QCheckBox("Пересчитывать при вводе")
+        v_layout.addWidget(self.live_check)
+        # перезапуск таймера при каждом вводе: в очереди не больше одного пересчёта
+        self.live_timer = QTimer(self)
+        self.live_timer.setSingleShot(True)
+        self.live_timer.setInterval(LIVE_DELAY_MS)
+        self.live_timer.timeout.connect(lambda: self.calculate(live=True))
+        self.results_label = ResultsView()
         v_layout.addWidget(self.results_label)
         v_layout.addSpacerItem(QSpacerItem(
             0, 0, QSizePolicy.Expanding, QSizePolicy.Expanding))
@@ -37,95 +172,142 @@ class Window(QMainWindow):
         self.scene2D = QGraphicsScene()
         self.view2D = QGraphicsView(self.scene2D)
         self.view2D.setMinimumSize(600, 400)
-        self.view3D = View3D()
-        self.view3D.setMinimumSize(600, 400)
+        # слой для массовой отрисовки плоских фигур создаётся при первом обращении
+        self.bulk_layer = None
+        # View3D (pyvista, VTK) создаётся при первом выборе объёмной фигуры
+        self.view3D = None
         self.stacked_widget = QStackedWidget()
         self.stacked_widget.addWidget(self.view2D)
-        self.stacked_widget.addWidget(self.view3D)
         h_layout.addWidget(self.stacked_widget)
 
         widget = QWidget()
         widget.setLayout(h_layout)
         self.setCentralWidget(widget)
 
+        self.timings_dock = QDockWidget("Производительность", self)
+        self.timings_dock.setWidget(TimingsPanel())
+        self.addDockWidget(Qt.RightDockWidgetArea, self.timings_dock)
+        self.timings_dock.hide()
+        self.menuBar().addMenu("Вид").addAction(self.timings_dock.toggleViewAction())
+
+    def set_opengl_viewport(self, enabled):
+        """Переключение 2D-вида на отрисовку через OpenGL"""
+        if enabled:
+            from PySide6.QtOpenGLWidgets import QOpenGLWidget
+            self.view2D.setViewport(QOpenGLWidget())
+            # с OpenGL дешевле перерисовать весь кадр, чем отслеживать изменённые области
+            self.view2D.setViewportUpdateMode(QGraphicsView.FullViewportUpdate)
+        else:
+            self.view2D.setViewport(QWidget())
+            self.view2D.setViewportUpdateMode(QGraphicsView.MinimalViewportUpdate)
+
+    def get_bulk_layer(self):
+        """Слой 2D-сцены для десятков тысяч фигур с отрисовкой только видимой области"""
+        if self.bulk_layer is None:
+            from bulk_2d import BulkShapeLayer
+            self.bulk_layer = BulkShapeLayer()
+            self.scene2D.addItem(self.bulk_layer)
+        return self.bulk_layer
+
+    def get_view3D(self):
+        """Ленивое создание 3D-вида и импорт pyvista"""
+        if self.view3D is None:
+            from view_3D import View3D
+            self.view3D = View3D()
+            self.view3D.setMinimumSize(600, 400)
+            self.stacked_widget.addWidget(self.view3D)
+        return self.view3D
+
+    def get_panel(self, figure_name):
+        """Панель параметров фигуры: создаётся при первом выборе и дальше только показывается"""
+        panel = self.panels.get(figure_name)
+        if panel is None:
+            shape_class = SHAPES[figure_name]
+            scene = self.get_view3D() if issubclass(shape_class, Shape3D) else self.scene2D
+            figure = shape_class(scene)
+            page = QWidget()
+            page.setLayout(figure.get_params_layout())
+            for field in fields(figure.params_class):
+                getattr(figure, f"{field.name}_edit").textEdited.connect(self.param_edited)
+            self.params_stack.addWidget(page)
+            panel = self.panels[figure_name] = (figure, page)
+        return panel
+
     def figure_selected(self, index):
-        QWidget().setLayout(self.params_widget.layout())
-        v_layout = QVBoxLayout()
-        self.results_label.setText("")
-        self.scene2D.clear()
-        self.view3D.clear()
+        self.runner.cancel("calculate")
+        self.live_timer.stop()
+        self.last = None
+        self.results_label.clear()
+        if self.figure is not None:
+            self.figure.clear()
+        if self.view3D is not None:
+            self.view3D.clear()
 
         figure_name = self.figure_selector.currentText()
-        if figure_name == "Triangle":
-            self.stacked_widget.setCurrentIndex(0)
-            self.figure = Triangle(self.scene2D)
-            v_layout.addLayout(self.figure.get_params_layout())
-        elif figure_name == "Rhombus":
-            self.stacked_widget.setCurrentIndex(0)
-            self.figure = Rhombus(self.scene2D)
-            v_layout.addLayout(self.figure.get_params_layout())
-        elif figure_name == "Rectangle":
-            self.stacked_widget.setCurrentIndex(0)
-            self.figure = Rectangle(self.scene2D)
-            v_layout.addLayout(self.figure.get_params_layout())
-        elif figure_name == "Square":
-            self.stacked_widget.setCurrentIndex(0)
-            self.figure = Square(self.scene2D)
-            v_layout.addLayout(self.figure.get_params_layout())
-        elif figure_name == "Circle":
-            self.stacked_widget.setCurrentIndex(0)
-            self.figure = Circle(self.scene2D)
-            v_layout.addLayout(self.figure.get_params_layout())
-        elif figure_name == "Cube":
-            self.stacked_widget.setCurrentIndex(1)
-            self.figure = Cube(self.view3D)
-            v_layout.addLayout(self.figure.get_params_layout())
-        elif figure_name == "Parallelepiped":
-            self.stacked_widget.setCurrentIndex(1)
-            self.figure = Parallelepiped(self.view3D)
-            v_layout.addLayout(self.figure.get_params_layout())
-        elif figure_name == "Sphere":
-            self.stacked_widget.setCurrentIndex(1)
-            self.figure = Sphere(self.view3D)
-            v_layout.addLayout(self.figure.get_params_layout())
-        elif figure_name == "Cylinder":
-            self.stacked_widget.setCurrentIndex(1)
-            self.figure = Cylinder(self.view3D)
-            v_layout.addLayout(self.figure.get_params_layout())
-        elif figure_name == "Pyramid":
-            self.stacked_widget.setCurrentIndex(1)
-            self.figure = Pyramid(self.view3D)
-            v_layout.addLayout(self.figure.get_params_layout())
-        elif figure_name == "Cone":
-            self.stacked_widget.setCurrentIndex(1)
-            self.figure = Cone(self.view3D)
-            v_layout.addLayout(self.figure.get_params_layout())
+        if figure_name in SHAPES:
+            self.figure, page = self.get_panel(figure_name)
+            self.params_stack.setCurrentWidget(page)
+            self.stacked_widget.setCurrentWidget(self.figure.scene if isinstance(self.figure, Shape3D)
+                                                 else self.view2D)
         else:
             self.figure = None
+            self.params_stack.setCurrentIndex(0)
+        self.calc_btn.setVisible(self.figure is not None)
 
-        if len(figure_name):
-            calc_btn = QPushButton("Calculate")
-            calc_btn.clicked.connect(self.calculate)
-            v_layout.addWidget(calc_btn)
-
-        self.params_widget.setLayout(v_layout)
+    def param_edited(self):
+        if self.live_check.isChecked():
+            self.live_timer.start()
 
-    def calculate(self):
-        self.results_label.setText("")
+    def calculate(self, live=False):
+        figure = self.figure
+        if figure is None:
+            return
+        on_error = self.show_live_error if live else self.show_error
         try:
-            result = self.figure.calculate()
-            ans = ""
-            for k, v in result.items():
-                ans += f"{k} = {v:.2f}\n"
-
-            self.results_label.setText(ans)
+            job = figure.prepare()
         except ValueError as e:
-            QMessageBox.critical(self, "", str(e.args[0]))
+            on_error(e)
+            return
+        params = job[0]
+        previous = None
+        if self.last is not None and self.last[0] is figure:
+            if live and self.last[1] == params:
+                return
+            previous = self.last[1:]
+        self.runner.submit("calculate", lambda token: figure.compute(job, token, previous),
+                           lambda output: self.show_result(figure, params, output), on_error)
+
+    def show_result(self, figure, params, output):
+        """Вывод результата фонового расчёта в потоке GUI"""
+        if figure is not self.figure:
+            return
+        result, geometry = output
+        figure.render(geometry)
+        self.last = (figure, params, result)
+        self.results_label.set_results(result)
+
+    def show_error(self, error):
+        if not isinstance(error, ValueError):
+            raise error
+        # прежние результаты не относятся к новым параметрам и не годятся для пересчёта
+        self.last = None
+        self.results_label.clear()
+        QMessageBox.critical(self, "", str(error.args[0]))
+
+    def show_live_error(self, error):
+        """Ошибка при живом пересчёте показывается под результатами, без диалога"""
+        if not isinstance(error, ValueError):
+            raise error
+        self.results_label.set_error(str(error.args[0]))
+
+    def closeEvent(self, event):
+        self.runner.shutdown()
+        super().closeEvent(event)
 
 
 if __name__ == '__main__':
     app = QApplication(sys.argv)
-    window = Window()
+    window = Window(opengl="--opengl" in sys.argv)
     window.show()
 
     app.exec()
@@ -0,0 +1,124 @@
+"""LRU-кэш сеток pyvista с ограничением по объёму памяти.
+
+Сетки хранятся по ключу (тип фигуры, параметры построения, разрешение) и
+вытесняются по суммарному размеру массивов точек, ячеек и данных, а не по
+числу записей. Сетки из кэша общие для всех вызовов и не должны изменяться.
+Кэш можно использовать из нескольких потоков.
+"""
+from collections import OrderedDict
+from threading import Lock
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def _sphere(**params):
+    import pyvista as pv
+    return pv.Sphere(**params)
+
+
+def _cylinder(**params):
+    import pyvista as pv
+    return pv.Cylinder(**params)
+
+
+def _cone(**params):
+    import pyvista as pv
+    return pv.Cone(**params)
+
+
+def _cube(**params):
+    import pyvista as pv
+    return pv.Cube(**params)
+
+
+FACTORIES = {
+    "sphere": _sphere,
+    "cylinder": _cylinder,
+    "cone": _cone,
+    "cube": _cube,
+}
+
+
+def mesh_nbytes(mesh):
+    """Размер массивов точек, связности ячеек и данных сетки в байтах"""
+    size = mesh.points.nbytes
+    for name in ("faces", "lines", "verts", "strips", "cells"):
+        cells = getattr(mesh, name, None)
+        if cells is not None:
+            size += cells.nbytes
+    for data in (mesh.point_data, mesh.cell_data):
+        size += sum(data[name].nbytes for name in data.keys())
+    return size
+
+
+class MeshCache:
+    """LRU-кэш сеток с вытеснением по суммарному размеру в байтах"""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def get(self, key, factory):
+        """Сетка по ключу; при промахе строится вызовом factory() вне блокировки"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.hits += 1
+                self.entries.move_to_end(key)
+                return entry[0]
+            self.misses += 1
+        mesh = factory()
+        size = mesh_nbytes(mesh)
+        with self.lock:
+            if key in self.entries:
+                # сетку параллельно построил другой поток
+                return self.entries[key][0]
+            self.entries[key] = (mesh, size)
+            self.total_bytes += size
+            self._evict()
+        return mesh
+
+    def _evict(self):
+        # последняя добавленная сетка остаётся, даже если одна превышает лимит
+        while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+            _, (_, size) = self.entries.popitem(last=False)
+            self.total_bytes -= size
+            self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
+
+    def stats(self):
+        """Счётчики попаданий, промахов и вытеснений"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+MESH_CACHE = MeshCache()
+
+
+def cached_mesh(kind, **params):
+    """Сетка фигуры kind ("sphere", "cylinder", "cone", "cube") из общего кэша"""
+    key = (kind, tuple(sorted(params.items())))
+    return MESH_CACHE.get(key, lambda: FACTORIES[kind](**params))
@@ -0,0 +1,200 @@
+"""Чтение треугольных сеток STL, OBJ и PLY и расчёт их характеристик.
+
+Двоичные STL и PLY читаются через np.memmap: файл не загружается целиком,
+а массивы точек и граней, если их раскладка в файле это позволяет,
+остаются видом на отображённый файл; для отрисовки копируется только
+массив граней. Площадь, объём (по теореме о
+дивергенции) и диагональ ограничивающего параллелепипеда считаются
+векторно по блокам граней, чтобы временные массивы не росли с размером сетки.
+"""
+import os
+from dataclasses import dataclass
+
+import numpy as np
+
+NO_FILE_ERROR = "Не указан файл сетки"
+EMPTY_ERROR = "Файл не содержит треугольников"
+# граней в одном блоке при расчёте характеристик
+CHUNK = 1 << 20
+
+PLY_TYPES = {
+    "char": "i1", "uchar": "u1", "short": "i2", "ushort": "u2", "int": "i4", "uint": "u4",
+    "float": "f4", "double": "f8", "int8": "i1", "uint8": "u1", "int16": "i2", "uint16": "u2",
+    "int32": "i4", "uint32": "u4", "float32": "f4", "float64": "f8",
+}
+
+
+@dataclass
+class MeshParams:
+    """Параметры сетки из файла"""
+    path: str = ""
+
+
+def read_stl(path):
+    """Точки (3n, 3) и грани (n, 3) из двоичного или текстового STL"""
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        header = f.read(84)
+    if len(header) == 84:
+        count = int(np.frombuffer(header, dtype="<u4", count=1, offset=80)[0])
+        if size == 84 + 50 * count:
+            record = np.dtype([("normal", "<f4", (3,)), ("vertices", "<f4", (3, 3)), ("attr", "<u2")])
+            data = np.memmap(path, dtype=record, mode="r", offset=84, shape=(count,))
+            # вершины в записи идут с шагом 50 байт, VTK нужен непрерывный массив
+            points = np.ascontiguousarray(data["vertices"]).reshape(-1, 3)
+            return points, np.arange(len(points), dtype=np.int64).reshape(-1, 3)
+    with open(path, encoding="ascii", errors="replace") as f:
+        values = [line.split()[1:4] for line in f if line.lstrip().startswith("vertex")]
+    points = np.array(values, dtype=np.float32).reshape(-1, 3)
+    return points, np.arange(len(points) // 3 * 3, dtype=np.int64).reshape(-1, 3)
+
+
+def fan(polygon):
+    """Разбиение выпуклого многоугольника на треугольники веером"""
+    return [(polygon[0], polygon[i], polygon[i + 1]) for i in range(1, len(polygon) - 1)]
+
+
+def read_obj(path):
+    """Точки и треугольные грани из OBJ; многоугольные грани разбиваются веером"""
+    points = []
+    faces = []
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            parts = line.split()
+            if not parts:
+                continue
+            if parts[0] == "v":
+                points.append(parts[1:4])
+            elif parts[0] == "f":
+                # индексы OBJ начинаются с 1, отрицательные отсчитываются от конца
+                polygon = [int(p.split("/")[0]) for p in parts[1:]]
+                polygon = [i - 1 if i > 0 else len(points) + i for i in polygon]
+                faces.extend(fan(polygon))
+    return np.array(points, dtype=np.float64).reshape(-1, 3), np.array(faces, dtype=np.int64).reshape(-1, 3)
+
+
+def _ply_header(path):
+    """Формат, элементы [(имя, число, свойства)] и размер заголовка PLY"""
+    elements = []
+    with open(path, "rb") as f:
+        if f.readline().strip() != b"ply":
+            raise ValueError(f"Файл {path} не является PLY")
+        fmt = None
+        while True:
+            line = f.readline()
+            if not line:
+                raise ValueError(f"Не найден конец заголовка PLY в {path}")
+            parts = line.decode("ascii", errors="replace").split()
+            if not parts:
+                continue
+            if parts[0] == "format":
+                fmt = parts[1]
+            elif parts[0] == "element":
+                elements.append((parts[1], int(parts[2]), []))
+            elif parts[0] == "property":
+                elements[-1][2].append(parts[1:])
+            elif parts[0] == "end_header":
+                return fmt, elements, f.tell()
+
+
+def read_ply(path):
+    """Точки и треугольные грани из PLY (двоичного или текстового)"""
+    fmt, elements, offset = _ply_header(path)
+    if fmt == "ascii":
+        return _read_ply_ascii(path, elements, offset)
+    order = "<" if fmt == "binary_little_endian" else ">"
+    points = faces = None
+    for name, count, properties in elements:
+        if any(p[0] == "list" for p in properties):
+            if len(properties) != 1:
+                raise ValueError("Поддерживаются грани только со списком вершин")
+            _, count_type, index_type, _ = properties[0]
+            dtype = np.dtype([("count", order + PLY_TYPES[count_type]),
+                              ("indices", order + PLY_TYPES[index_type], (3,))])
+            block = np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=(count,))
+            if name == "face":
+                if count and not (block["count"] == 3).all():
+                    raise ValueError("Двоичный PLY должен содержать только треугольные грани")
+                faces = block["indices"]
+        else:
+            dtype = np.dtype([(p[1], order + PLY_TYPES[p[0]]) for p in properties])
+            block = np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=(count,))
+            if name == "vertex":
+                points = _xyz(block, dtype)
+        offset += block.nbytes
+    return points, faces
+
+
+def _xyz(block, dtype):
+    """Координаты вершин; если в записи только x, y, z одного типа - без копирования"""
+    if dtype.names == ("x", "y", "z") and len({dtype[i] for i in range(3)}) == 1:
+        return block.view((dtype[0], 3)).reshape(-1, 3)
+    return np.column_stack([block["x"], block["y"], block["z"]])
+
+
+def _read_ply_ascii(path, elements, offset):
+    with open(path, "rb") as f:
+        f.seek(offset)
+        lines = iter(f.read().decode("ascii", errors="replace").splitlines())
+    points = None
+    faces = []
+    for name, count, properties in elements:
+        rows = [next(lines).split() for _ in range(count)]
+        if name == "vertex":
+            columns = [p[-1] for p in properties]
+            data = np.array(rows, dtype=np.float64).reshape(-1, len(columns))
+            points = data[:, [columns.index(axis) for axis in "xyz"]]
+        elif name == "face":
+            for row in rows:
+                faces.extend(fan([int(i) for i in row[1:1 + int(row[0])]]))
+    return points, np.array(faces, dtype=np.int64).reshape(-1, 3)
+
+
+READERS = {".stl": read_stl, ".obj": read_obj, ".ply": read_ply}
+
+
+def validate_mesh(path):
+    """Проверка, что путь задан, файл существует и формат поддерживается"""
+    if not path:
+        raise ValueError(NO_FILE_ERROR)
+    if os.path.splitext(path)[1].lower() not in READERS:
+        raise ValueError(f"Неподдерживаемый формат сетки: {path}")
+    if not os.path.isfile(path):
+        raise ValueError(f"Файл не найден: {path}")
+
+
+def load_mesh(path):
+    """Точки и грани сетки из файла по его расширению"""
+    validate_mesh(path)
+    points, faces = READERS[os.path.splitext(path)[1].lower()](path)
+    if points is None or faces is None or not len(faces):
+        raise ValueError(EMPTY_ERROR)
+    return points, faces
+
+
+def mesh_properties(points, faces, chunk=CHUNK):
+    """Площадь поверхности, объём и диагональ ограничивающего параллелепипеда"""
+    low = points.min(axis=0).astype(np.float64)
+    high = points.max(axis=0).astype(np.float64)
+    # объём считается относительно центра сетки, чтобы уменьшить ошибку округления
+    center = (low + high) / 2
+    area = 0.0
+    volume = 0.0
+    for start in range(0, len(faces), chunk):
+        block = faces[start:start + chunk]
+        v0 = points[block[:, 0]] - center
+        e1 = points[block[:, 1]] - center - v0
+        e2 = points[block[:, 2]] - center - v0
+        normal = np.cross(e1, e2)
+        area += np.sqrt(np.einsum("ij,ij->i", normal, normal)).sum() / 2
+        # v0 . (v1 x v2) = v0 . (e1 x e2)
+        volume += np.einsum("ij,ij->", v0, normal) / 6
+    return {"area": float(area), "volume": abs(float(volume)), "diagonal": float(np.linalg.norm(high - low))}
+
+
+def to_polydata(points, faces):
+    """Сетка pyvista поверх тех же точек; грани переписываются в формат VTK (3, i, j, k)"""
+    import pyvista as pv
+    # PolyData.from_regular_faces нет в pyvista 0.33, поэтому массив граней строится явно
+    cells = np.hstack([np.full((len(faces), 1), 3, dtype=np.int64), np.asarray(faces, dtype=np.int64)])
+    return pv.PolyData(points, cells.ravel())
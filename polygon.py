@@ -0,0 +1,110 @@
+"""Многоугольник с произвольным числом вершин.
+
+Вершины хранятся массивом NumPy (n, 2); площадь (формула шнурования),
+периметр, центр масс и выпуклость считаются векторно, поэтому годятся и
+для оцифрованных контуров из миллионов точек. Для отрисовки контур
+прореживается по сетке с шагом в один пиксель текущего масштаба.
+"""
+import os
+from dataclasses import dataclass
+
+import numpy as np
+
+VERTICES_ERROR = "Многоугольник должен иметь не меньше 3 вершин"
+FINITE_ERROR = "Координаты вершин должны быть конечными числами"
+
+
+@dataclass
+class PolygonParams:
+    """Параметры многоугольника: вершины строкой "x y; x y; ..." или путь к файлу .npy, .csv, .txt"""
+    vertices: str = ""
+
+
+def load_vertices(text):
+    """Массив вершин (n, 2) из строки с координатами или из файла"""
+    text = text.strip()
+    extension = os.path.splitext(text)[1].lower()
+    if extension in (".npy", ".csv", ".txt"):
+        if not os.path.isfile(text):
+            raise ValueError(f"Файл не найден: {text}")
+        try:
+            if extension == ".npy":
+                points = np.load(text, mmap_mode="r")
+            else:
+                points = np.loadtxt(text, delimiter="," if extension == ".csv" else None, ndmin=2)
+        except (OSError, ValueError) as e:
+            raise ValueError(f"Не удалось прочитать файл вершин {text}: {e}") from None
+    else:
+        pairs = [pair.split() for pair in text.replace(",", " ").split(";") if pair.strip()]
+        try:
+            points = np.array(pairs, dtype=np.float64)
+        except ValueError:
+            raise ValueError(f"Неверный список вершин: {text}") from None
+    points = np.asarray(points, dtype=np.float64)
+    if points.ndim != 2 or points.shape[1] != 2:
+        raise ValueError(f"Неверный список вершин: {text}")
+    return points
+
+
+def moved(points):
+    """Маска вершин, из которых выходит ребро ненулевой длины"""
+    # повтор вершины, в том числе замыкающей, даёт ребро нулевой длины
+    return (points != np.roll(points, -1, axis=0)).any(axis=1)
+
+
+def validate_polygon(points):
+    if len(points) < 3:
+        raise ValueError(VERTICES_ERROR)
+    if not np.isfinite(points).all():
+        raise ValueError(FINITE_ERROR)
+    if np.count_nonzero(moved(points)) < 3:
+        raise ValueError(VERTICES_ERROR)
+
+
+def polygon_properties(points):
+    """Площадь, периметр, центр масс и выпуклость многоугольника"""
+    # координаты относительно первой вершины уменьшают потерю точности в сумме
+    origin = points[0]
+    x = points[:, 0] - origin[0]
+    y = points[:, 1] - origin[1]
+    x1 = np.roll(x, -1)
+    y1 = np.roll(y, -1)
+    cross = x * y1 - x1 * y
+    doubled = cross.sum()
+    perimeter = np.hypot(x1 - x, y1 - y).sum()
+    if doubled:
+        cx = ((x + x1) * cross).sum() / (3 * doubled) + origin[0]
+        cy = ((y + y1) * cross).sum() / (3 * doubled) + origin[1]
+    else:
+        cx, cy = points.mean(axis=0)
+    return {"area": float(abs(doubled)) / 2, "perimeter": float(perimeter), "centroid_x": float(cx),
+            "centroid_y": float(cy), "convex": is_convex(x, y)}
+
+
+def is_convex(x, y):
+    """Повороты во всех вершинах в одну сторону и контур обходится ровно один раз"""
+    dx = np.roll(x, -1) - x
+    dy = np.roll(y, -1) - y
+    # рёбра нулевой длины не задают направления и дали бы ложные повороты
+    edges = (dx != 0) | (dy != 0)
+    dx, dy = dx[edges], dy[edges]
+    turns = dx * np.roll(dy, -1) - dy * np.roll(dx, -1)
+    turns = turns[turns != 0]
+    if not len(turns) or not ((turns > 0).all() or (turns < 0).all()):
+        return False
+    # у выпуклого контура сумма углов поворота равна 2 pi; звёздчатые дают 4 pi и больше
+    angles = np.arctan2(np.roll(dy, -1), np.roll(dx, -1)) - np.arctan2(dy, dx)
+    total = np.abs(np.mod(angles + np.pi, 2 * np.pi) - np.pi).sum()
+    return bool(total < 2 * np.pi + 1e-6)
+
+
+def simplify(points, tolerance):
+    """Прореживание контура: из подряд идущих вершин в одной клетке сетки остаётся первая"""
+    if tolerance <= 0 or len(points) < 4:
+        return points
+    cells = np.floor(points / tolerance)
+    keep = np.empty(len(points), dtype=bool)
+    keep[0] = True
+    keep[1:] = (cells[1:] != cells[:-1]).any(axis=1)
+    keep[-1] = True
+    return points[keep]
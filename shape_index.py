@@ -0,0 +1,312 @@
+"""Запросы к большим наборам плоских фигур: точка, прямоугольник, пересечения.
+
+Фигуры хранятся в массивах: вид контура, ограничивающий прямоугольник и
+до четырёх вершин (прямоугольник, квадрат, треугольник, ромб) или центр и
+радиус (круг). Грубый отбор делает GridIndex по ограничивающим
+прямоугольникам, затем для кандидатов выполняются точные проверки: все
+фигуры выпуклые, поэтому многоугольники сравниваются по теореме о
+разделяющей оси, а круги - по расстоянию.
+
+Массивы фигур хранятся с запасом ёмкости, поэтому добавление одной фигуры
+не копирует весь набор. Добавленные фигуры сначала попадают в список
+ограниченного размера, который проверяется перебором, удалённые только
+помечаются; когда список заполнен или удалённых становится много, сетка
+перестраивается по живым фигурам. Номера фигур при этом не меняются.
+"""
+import numpy as np
+
+from geometry_batch import calculate_batch
+from spatial_index import GridIndex, normalized
+
+RECT, CIRCLE, POLYGON = range(3)
+SHAPE_NAMES = ["Triangle", "Rectangle", "Square", "Circle", "Rhombus"]
+# добавленных фигур, проверяемых перебором до перестройки сетки
+MAX_PENDING = 4096
+# доля удалённых фигур, после которой сетка перестраивается
+REBUILD_FRACTION = 0.1
+
+
+def outlines(shape, x, y, **params):
+    """Вид контура, ограничивающие прямоугольники и вершины фигур shape с углом в (x, y).
+
+    Для круга вершины не используются: центр и радиус берутся из прямоугольника.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    vertices = np.zeros((n, 4, 2))
+    if shape == "Circle":
+        d = 2 * np.asarray(params["r"], dtype=np.float64)
+        return np.full(n, CIRCLE, dtype=np.int8), np.column_stack([x, y, x + d, y + d]), vertices
+    kind = POLYGON
+    if shape in ("Rectangle", "Square"):
+        a = np.asarray(params["a"], dtype=np.float64)
+        b = a if shape == "Square" else np.asarray(params["b"], dtype=np.float64)
+        vertices[:, 1] = np.column_stack([a, np.zeros(n)])
+        vertices[:, 2] = np.column_stack([a, b])
+        vertices[:, 3] = np.column_stack([np.zeros(n), b])
+        kind = RECT
+    elif shape == "Rhombus":
+        a = np.asarray(params["a"], dtype=np.float64)
+        h = np.asarray(params["h"], dtype=np.float64)
+        s = np.sqrt(a * a - h * h)
+        vertices[:, 1] = np.column_stack([s, h])
+        vertices[:, 2] = np.column_stack([a + s, h])
+        vertices[:, 3] = np.column_stack([a, np.zeros(n)])
+    elif shape == "Triangle":
+        a, b, c = (np.asarray(params[name], dtype=np.float64) for name in "abc")
+        x3 = (a * a + b * b - c * c) / (2 * a)
+        vertices[:, 1] = np.column_stack([a, np.zeros(n)])
+        vertices[:, 2] = np.column_stack([x3, -np.sqrt(b * b - x3 * x3)])
+        # четвёртая вершина совпадает с первой, чтобы хранить все многоугольники одинаково
+    else:
+        raise ValueError(f"Неизвестная плоская фигура: {shape}")
+    vertices += np.stack([x, y], axis=1)[:, None, :]
+    bboxes = np.column_stack([vertices[..., 0].min(axis=1), vertices[..., 1].min(axis=1),
+                              vertices[..., 0].max(axis=1), vertices[..., 1].max(axis=1)])
+    return np.full(n, kind, dtype=np.int8), bboxes, vertices
+
+
+def box_vertices(bboxes):
+    """Вершины прямоугольников (m, 4) как многоугольников (m, 4, 2)"""
+    x0, y0, x1, y1 = bboxes.T
+    return np.stack([np.column_stack([x0, y0]), np.column_stack([x1, y0]),
+                     np.column_stack([x1, y1]), np.column_stack([x0, y1])], axis=1)
+
+
+def points_in_polygons(px, py, vertices):
+    """Попадание точки в каждый из многоугольников (правило чётности пересечений)"""
+    x0, y0 = vertices[..., 0], vertices[..., 1]
+    x1, y1 = np.roll(x0, -1, axis=1), np.roll(y0, -1, axis=1)
+    crosses = (y0 > py) != (y1 > py)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        at_x = x0 + (py - y0) * (x1 - x0) / (y1 - y0)
+    return (crosses & (px < at_x)).sum(axis=1) % 2 == 1
+
+
+def _edge_normals(vertices):
+    edges = np.roll(vertices, -1, axis=1) - vertices
+    return np.stack([-edges[..., 1], edges[..., 0]], axis=-1)
+
+
+def _project(vertices, axes):
+    """Проекции вершин (m, k, 2) на оси (m, q, 2): минимумы и максимумы (m, q)"""
+    projections = np.einsum("mkd,mqd->mqk", vertices, axes)
+    return projections.min(axis=2), projections.max(axis=2)
+
+
+def polygons_overlap(a, b):
+    """Пересечение выпуклых многоугольников a[i] и b[i] (теорема о разделяющей оси)"""
+    axes = np.concatenate([_edge_normals(a), _edge_normals(b)], axis=1)
+    a_min, a_max = _project(a, axes)
+    b_min, b_max = _project(b, axes)
+    return ~((a_max < b_min) | (b_max < a_min)).any(axis=1)
+
+
+def circles_polygons_overlap(centers, radii, polygons):
+    """Пересечение кругов с выпуклыми многоугольниками"""
+    # оси: нормали рёбер и направление от центра к ближайшей вершине
+    offsets = polygons - centers[:, None, :]
+    nearest = offsets[np.arange(len(polygons)), np.einsum("mkd,mkd->mk", offsets, offsets).argmin(axis=1)]
+    axes = np.concatenate([_edge_normals(polygons), nearest[:, None, :]], axis=1)
+    lengths = np.linalg.norm(axes, axis=2)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        axes = np.where(lengths[..., None] > 0, axes / lengths[..., None], 0)
+    p_min, p_max = _project(polygons, axes)
+    c = np.einsum("md,mqd->mq", centers, axes)
+    r = radii[:, None] * (lengths > 0)
+    return ~((p_max < c - r) | (c + r < p_min)).any(axis=1)
+
+
+class ShapeIndex:
+    """Набор плоских фигур с пространственным индексом и точными проверками"""
+
+    def __init__(self):
+        # массивы с запасом: заполнены первые count строк, при нехватке ёмкость удваивается
+        self.count = 0
+        self.live = 0
+        self._kinds = np.empty(0, dtype=np.int8)
+        self._shape_codes = np.empty(0, dtype=np.int8)
+        self._bboxes = np.empty((0, 4))
+        self._vertices = np.empty((0, 4, 2))
+        self._alive = np.empty(0, dtype=bool)
+        self.grid = GridIndex(self.bboxes)
+        # добавленные после перестройки сетки: номера и прямоугольники подряд для перебора
+        self.pending = np.empty(MAX_PENDING, dtype=np.int64)
+        self.pending_bboxes = np.empty((MAX_PENDING, 4))
+        self.pending_count = 0
+        # удалённые после перестройки сетки
+        self.removed = 0
+
+    def __len__(self):
+        return self.live
+
+    @property
+    def size(self):
+        """Число строк вместе с удалёнными; номера фигур меньше size"""
+        return self.count
+
+    @property
+    def kinds(self):
+        return self._kinds[:self.count]
+
+    @property
+    def shape_codes(self):
+        return self._shape_codes[:self.count]
+
+    @property
+    def bboxes(self):
+        return self._bboxes[:self.count]
+
+    @property
+    def vertices(self):
+        return self._vertices[:self.count]
+
+    @property
+    def alive(self):
+        return self._alive[:self.count]
+
+    def _reserve(self, size):
+        capacity = len(self._kinds)
+        if size <= capacity:
+            return
+        capacity = max(size, 2 * capacity, 1024)
+        for name in ("_kinds", "_shape_codes", "_bboxes", "_vertices", "_alive"):
+            old = getattr(self, name)
+            new = np.empty((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+
+    def insert(self, shape, x, y, **params):
+        """Добавление фигур shape с углом в (x, y); неверные отбрасываются. Возвращает номера"""
+        names = list(params)
+        arrays = np.broadcast_arrays(np.atleast_1d(np.asarray(x, dtype=np.float64)),
+                                     np.atleast_1d(np.asarray(y, dtype=np.float64)),
+                                     *(np.atleast_1d(np.asarray(params[name], dtype=np.float64)) for name in names))
+        x, y = arrays[:2]
+        params = dict(zip(names, arrays[2:]))
+        valid = calculate_batch(shape, **params).valid
+        params = {name: value[valid] for name, value in params.items()}
+        kinds, bboxes, vertices = outlines(shape, x[valid], y[valid], **params)
+
+        n = len(kinds)
+        start, stop = self.count, self.count + n
+        self._reserve(stop)
+        self._kinds[start:stop] = kinds
+        self._shape_codes[start:stop] = SHAPE_NAMES.index(shape)
+        self._bboxes[start:stop] = bboxes
+        self._vertices[start:stop] = vertices
+        self._alive[start:stop] = True
+        self.count = stop
+        self.live += n
+
+        ids = np.arange(start, stop)
+        if self.pending_count + n > MAX_PENDING:
+            self.rebuild()
+        else:
+            self.pending[self.pending_count:self.pending_count + n] = ids
+            self.pending_bboxes[self.pending_count:self.pending_count + n] = bboxes
+            self.pending_count += n
+        return ids
+
+    def delete(self, ids):
+        """Удаление фигур по номерам"""
+        ids = np.unique(np.atleast_1d(np.asarray(ids, dtype=np.int64)))
+        alive = self.alive
+        removed = int(alive[ids].sum())
+        alive[ids] = False
+        self.live -= removed
+        self.removed += removed
+        if self.removed > max(MAX_PENDING, REBUILD_FRACTION * len(self.grid)):
+            self.rebuild()
+
+    def rebuild(self):
+        """Перестройка сетки по живым фигурам"""
+        ids = np.flatnonzero(self.alive)
+        self.grid = GridIndex(self.bboxes[ids], ids=ids)
+        self.pending_count = 0
+        self.removed = 0
+
+    def candidates(self, xmin, ymin, xmax, ymax):
+        """Живые фигуры, чьи ограничивающие прямоугольники пересекают заданный"""
+        xmin, ymin, xmax, ymax = normalized(xmin, ymin, xmax, ymax)
+        ids = self.grid.query(xmin, ymin, xmax, ymax)
+        if self.pending_count:
+            b = self.pending_bboxes[:self.pending_count]
+            hit = (b[:, 0] <= xmax) & (b[:, 2] >= xmin) & (b[:, 1] <= ymax) & (b[:, 3] >= ymin)
+            ids = np.concatenate([ids, self.pending[:self.pending_count][hit]])
+        if self.removed:
+            ids = ids[self.alive[ids]]
+        return ids
+
+    def contains_point(self, x, y):
+        """Номера фигур, содержащих точку (x, y)"""
+        ids = self.candidates(x, y, x, y)
+        kinds = self.kinds[ids]
+        hit = kinds == RECT
+        circles = kinds == CIRCLE
+        if circles.any():
+            b = self.bboxes[ids[circles]]
+            r = (b[:, 2] - b[:, 0]) / 2
+            hit[circles] = (x - b[:, 0] - r) ** 2 + (y - b[:, 1] - r) ** 2 <= r * r
+        polygons = kinds == POLYGON
+        if polygons.any():
+            hit[polygons] = points_in_polygons(x, y, self.vertices[ids[polygons]])
+        return ids[hit]
+
+    def intersects_box(self, xmin, ymin, xmax, ymax):
+        """Номера фигур, пересекающих прямоугольник"""
+        xmin, ymin, xmax, ymax = normalized(xmin, ymin, xmax, ymax)
+        ids = self.candidates(xmin, ymin, xmax, ymax)
+        return ids[self._overlap_box(ids, np.array([xmin, ymin, xmax, ymax], dtype=np.float64))]
+
+    def _overlap_box(self, ids, box):
+        kinds = self.kinds[ids]
+        hit = kinds == RECT
+        circles = kinds == CIRCLE
+        if circles.any():
+            b = self.bboxes[ids[circles]]
+            r = (b[:, 2] - b[:, 0]) / 2
+            cx, cy = b[:, 0] + r, b[:, 1] + r
+            dx = cx - np.clip(cx, box[0], box[2])
+            dy = cy - np.clip(cy, box[1], box[3])
+            hit[circles] = dx * dx + dy * dy <= r * r
+        polygons = kinds == POLYGON
+        if polygons.any():
+            boxes = np.broadcast_to(box_vertices(box[None, :]), (int(polygons.sum()), 4, 2))
+            hit[polygons] = polygons_overlap(self.vertices[ids[polygons]], boxes)
+        return hit
+
+    def overlapping_pairs(self):
+        """Пары номеров (i, j), i < j, пересекающихся фигур"""
+        if self.pending_count or self.removed:
+            self.rebuild()
+        pairs = self.grid.pairs()
+        a, b = pairs[:, 0], pairs[:, 1]
+        circle_a = self.kinds[a] == CIRCLE
+        circle_b = self.kinds[b] == CIRCLE
+        hit = np.zeros(len(pairs), dtype=bool)
+
+        both = circle_a & circle_b
+        if both.any():
+            ba, bb = self.bboxes[a[both]], self.bboxes[b[both]]
+            ra, rb = (ba[:, 2] - ba[:, 0]) / 2, (bb[:, 2] - bb[:, 0]) / 2
+            dx = (ba[:, 0] + ra) - (bb[:, 0] + rb)
+            dy = (ba[:, 1] + ra) - (bb[:, 1] + rb)
+            hit[both] = dx * dx + dy * dy <= (ra + rb) ** 2
+
+        mixed = circle_a != circle_b
+        if mixed.any():
+            circle = np.where(circle_a, a, b)[mixed]
+            other = np.where(circle_a, b, a)[mixed]
+            bc = self.bboxes[circle]
+            r = (bc[:, 2] - bc[:, 0]) / 2
+            hit[mixed] = circles_polygons_overlap(bc[:, :2] + r[:, None], r, self.vertices[other])
+
+        neither = ~circle_a & ~circle_b
+        if neither.any():
+            hit[neither] = polygons_overlap(self.vertices[a[neither]], self.vertices[b[neither]])
+        return pairs[hit]
+
+    def shape_name(self, i):
+        return SHAPE_NAMES[self.shape_codes[i]]
@@ -0,0 +1,207 @@
+"""Компактное хранилище миллионов фигур в структурированном массиве NumPy.
+
+Фигуры одного семейства (плоские или объёмные) лежат в одном массиве
+записей: код типа фигуры, координаты и параметры в порядке объявления
+в geometry_core. Массив может быть отображён на файл .npy, тогда коллекция
+открывается без чтения в память. Отдельная фигура доступна через
+ShapeView - лёгкое представление с интерфейсом, похожим на Shape2D/Shape3D,
+которое хранит только ссылку на хранилище и номер строки.
+"""
+from dataclasses import fields
+
+import numpy as np
+
+import geometry_core as core
+from geometry_batch import calculate_batch, param_names
+
+SHAPE_NAMES = list(core.SHAPES)
+SHAPE_CODES = {name: code for code, name in enumerate(SHAPE_NAMES)}
+# код незаполненной записи; нулевой код занят первой фигурой
+EMPTY = -1
+MAX_PARAMS = max(len(param_names(name)) for name in core.SHAPES)
+
+FAMILIES = {
+    "2D": {
+        "shapes": ("Triangle", "Rectangle", "Square", "Circle", "Rhombus"),
+        "dtype": np.dtype([("code", np.int8), ("x", np.float64), ("y", np.float64),
+                           ("params", np.float64, (MAX_PARAMS,))]),
+    },
+    "3D": {
+        "shapes": ("Cube", "Sphere", "Cylinder", "Cone", "Parallelepiped", "Pyramid"),
+        "dtype": np.dtype([("code", np.int8), ("x", np.float64), ("y", np.float64), ("z", np.float64),
+                           ("params", np.float64, (MAX_PARAMS,))]),
+    },
+}
+
+
+def shape_family(shape):
+    """Семейство ("2D" или "3D"), к которому относится фигура"""
+    name = core.get_spec(shape).name
+    for family, info in FAMILIES.items():
+        if name in info["shapes"]:
+            return family
+    raise ValueError(f"Фигура не входит ни в одно семейство: {name}")
+
+
+class ShapeStore:
+    """Коллекция фигур одного семейства в массиве записей"""
+
+    def __init__(self, family, records):
+        if records.dtype != FAMILIES[family]["dtype"]:
+            raise ValueError(f"Тип записей не соответствует семейству {family}")
+        self.family = family
+        self.records = records
+
+    @classmethod
+    def create(cls, family, size, path=None):
+        """Пустая коллекция из size фигур; при заданном path - в файле .npy, отображённом в память"""
+        dtype = FAMILIES[family]["dtype"]
+        if path is None:
+            records = np.zeros(size, dtype=dtype)
+        else:
+            records = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=(size,))
+        records["code"] = EMPTY
+        return cls(family, records)
+
+    @classmethod
+    def open(cls, path, mode="r"):
+        """Открытие коллекции из файла .npy без чтения в память"""
+        records = np.load(path, mmap_mode=mode)
+        for family, info in FAMILIES.items():
+            if records.dtype == info["dtype"]:
+                return cls(family, records)
+        raise ValueError(f"Файл {path} не содержит коллекцию фигур")
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, index):
+        if not -len(self) <= index < len(self):
+            raise IndexError(index)
+        index %= len(self)
+        if self.records["code"][index] == EMPTY:
+            raise IndexError(f"Строка {index} не заполнена")
+        return ShapeView(self, index)
+
+    def __iter__(self):
+        """Заполненные строки коллекции"""
+        return (ShapeView(self, int(i)) for i in self.filled())
+
+    def filled(self):
+        """Номера заполненных строк"""
+        return np.flatnonzero(self.records["code"] != EMPTY)
+
+    def flush(self):
+        if isinstance(self.records, np.memmap):
+            self.records.flush()
+
+    def fill(self, start, shape, position, **params):
+        """Запись фигур shape в строки начиная со start; параметры и координаты - массивы"""
+        if shape not in FAMILIES[self.family]["shapes"]:
+            raise ValueError(f"Фигура {shape} не входит в семейство {self.family}")
+        names = param_names(shape)
+        position = np.asarray(position, dtype=np.float64)
+        arrays = np.broadcast_arrays(*(np.asarray(params[name], dtype=np.float64) for name in names),
+                                     position[..., 0])
+        n = len(arrays[-1])
+        # проверка до записи: иначе часть строк получила бы код фигуры без параметров
+        if not 0 <= start <= len(self) - n:
+            raise ValueError(f"Строки {start}..{start + n - 1} вне коллекции из {len(self)} строк")
+        rows = self.records[start:start + n]
+        rows["code"] = SHAPE_CODES[shape]
+        for axis, column in enumerate(("x", "y", "z")[:position.shape[-1]]):
+            rows[column] = position[..., axis]
+        for slot, values in enumerate(arrays[:-1]):
+            rows["params"][:, slot] = values
+        return start + len(rows)
+
+    def rows(self, shape):
+        """Номера строк с фигурами shape"""
+        return np.flatnonzero(self.records["code"] == SHAPE_CODES[shape])
+
+    def columns(self, shape, rows=None):
+        """Параметры фигур shape как словарь столбцов для geometry_batch"""
+        if rows is None:
+            rows = self.rows(shape)
+        params = self.records["params"][rows]
+        return {name: params[:, slot] for slot, name in enumerate(param_names(shape))}
+
+    def calculate(self, shape, rows=None):
+        """Пакетный расчёт характеристик всех фигур shape коллекции"""
+        return calculate_batch(shape, **self.columns(shape, rows))
+
+    def counts(self):
+        """Число фигур каждого типа"""
+        codes = self.records["code"]
+        codes = np.bincount(codes[codes != EMPTY], minlength=len(SHAPE_CODES))
+        return {name: int(codes[code]) for name, code in SHAPE_CODES.items() if codes[code]}
+
+
+class ShapeView:
+    """Фигура из ShapeStore: чтение и запись параметров идут прямо в строку массива.
+
+    Повторяет интерфейс Shape: атрибуты параметров, сеттеры set_*, геттеры
+    характеристик get_*, params, validate() и calculate().
+    """
+    __slots__ = ("store", "index")
+
+    def __init__(self, store, index):
+        self.store = store
+        self.index = index
+
+    @property
+    def record(self):
+        return self.store.records[self.index]
+
+    @property
+    def name(self):
+        code = self.store.records["code"][self.index]
+        if code == EMPTY:
+            raise ValueError(f"Строка {self.index} не заполнена")
+        return SHAPE_NAMES[code]
+
+    @property
+    def spec(self):
+        return core.get_spec(self.name)
+
+    @property
+    def params(self):
+        """Параметры фигуры для вычислительного ядра geometry_core"""
+        params_class = self.spec.params
+        values = self.store.records["params"][self.index].tolist()
+        # дробное значение целого поля не обрезается, чтобы его отклонила проверка
+        return params_class(*(int(value) if f.type is int and value.is_integer() else value
+                              for value, f in zip(values, fields(params_class))))
+
+    @property
+    def position(self):
+        record = self.record
+        return tuple(float(record[axis]) for axis in ("x", "y", "z") if axis in record.dtype.names)
+
+    def validate(self):
+        core.validate(self.params)
+
+    def calculate(self):
+        return core.calculate(self.params)
+
+    def __getattr__(self, attr):
+        try:
+            name = self.name
+        except ValueError:
+            # у незаполненной строки нет атрибутов фигуры; hasattr и getattr с умолчанием должны работать
+            raise AttributeError(attr) from None
+        names = param_names(name)
+        if attr in names:
+            return float(self.store.records["params"][self.index, names.index(attr)])
+        if attr.startswith("set_") and attr[4:] in names:
+            slot = names.index(attr[4:])
+
+            def setter(value):
+                self.store.records["params"][self.index, slot] = value
+            return setter
+        if attr.startswith("get_") and attr[4:] in core.get_spec(name).properties:
+            return lambda: core.evaluate(self.params)[attr[4:]]
+        raise AttributeError(attr)
+
+    def __repr__(self):
+        return f"ShapeView({self.name}, {self.index})"
@@ -0,0 +1,226 @@
+"""Снимки объёмных фигур в PNG без окна программы.
+
+Для отчётов нужны тысячи миниатюр, а View3D с QtInteractor на каждый
+снимок создаётся слишком долго. SnapshotRenderer держит один внеэкранный
+Plotter и один актёр: для очередной фигуры актёру подставляется общая
+единичная сетка из кэша и задаётся масштаб по осям, после чего кадр
+сразу пишется в PNG. Задания читаются и обрабатываются потоком, поэтому
+расход памяти не растёт с их числом; при workers > 1 блоки заданий
+рисуются в пуле процессов, у каждого процесса свой Plotter.
+
+Запуск: python main.py snapshots input.csv output_dir [--workers N] [--size W H]
+"""
+import argparse
+import itertools
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import fields
+
+try:
+    import resource
+except ImportError:
+    # модуля resource нет в Windows, там пиковая память не выводится
+    resource = None
+
+import geometry_core as core
+from batch_io import NUMBER_ERROR, read_chunks
+from bulk_3d import UNIT_MESHES, instance_scales, unit_mesh
+from geometry_batch import param_names
+from mesh_cache import cached_mesh
+
+SNAPSHOT_SHAPES = ("Cube", "Sphere", "Cylinder", "Cone", "Parallelepiped", "Pyramid")
+DEFAULT_SIZE = (256, 256)
+# сегментов по окружности у сферы, цилиндра и конуса
+SEGMENTS = 32
+# заданий в блоке для процесса пула
+DEFAULT_CHUNK_SIZE = 256
+
+
+def snapshot_params(shape, params):
+    """Проверка параметров правилами geometry_core и приведение к типам полей"""
+    core.validate(core.make_params(shape, **params))
+    return {f.name: f.type(params[f.name]) for f in fields(core.get_spec(shape).params)}
+
+
+def snapshot_mesh(shape, params):
+    """Общая единичная сетка фигуры и её масштаб по осям"""
+    if shape == "Pyramid":
+        # как в окне программы: конус с n гранями, радиус основания a; ось конуса - x
+        a, h = params["a"], params["h"]
+        return cached_mesh("cone", radius=1, height=1, resolution=params["n"]), (h, a, a)
+    if shape not in UNIT_MESHES:
+        raise ValueError(f"Нет снимка для фигуры: {shape}")
+    return unit_mesh(shape, SEGMENTS), tuple(instance_scales(shape, **params)[0])
+
+
+class SnapshotRenderer:
+    """Внеэкранный Plotter, многократно используемый для снимков разных фигур"""
+
+    def __init__(self, size=DEFAULT_SIZE, color="green", show_edges=True, compression=1):
+        import pyvista as pv
+        from vtkmodules.vtkIOImage import vtkPNGWriter
+        from vtkmodules.vtkRenderingCore import vtkWindowToImageFilter
+
+        self.plotter = pv.Plotter(off_screen=True, window_size=list(size))
+        self.style = {"color": color, "show_edges": show_edges}
+        self.actor = None
+        # фильтр сам перерисовывает окно при записи, отдельный render() не нужен
+        self.image = vtkWindowToImageFilter()
+        self.image.SetInput(self.plotter.render_window)
+        self.image.ReadFrontBufferOff()
+        self.writer = vtkPNGWriter()
+        self.writer.SetCompressionLevel(compression)
+        self.writer.SetInputConnection(self.image.GetOutputPort())
+
+    def render(self, shape, params, path):
+        """Проверка параметров и снимок фигуры shape в файл path"""
+        params = snapshot_params(shape, params)
+        mesh, scale = snapshot_mesh(shape, params)
+        if self.actor is None:
+            self.actor = self.plotter.add_mesh(mesh, render=False, **self.style)
+            self.plotter.view_isometric(render=False)
+            # до первого show() pyvista не отрисовывает окно и кадр не готов
+            self.plotter.show(auto_close=False)
+        else:
+            # сетка из общего кэша не изменяется, поэтому подставляется без копирования
+            self.actor.GetMapper().SetInputData(mesh)
+        self.actor.SetScale(scale)
+        # plotter.reset_camera() сам перерисовывает окно, а кадр и так отрисует фильтр
+        self.plotter.renderer.ResetCamera()
+        self.image.Modified()
+        self.writer.SetFileName(path)
+        self.writer.Write()
+
+    def close(self):
+        self.plotter.close()
+
+
+def snapshot_path(output_dir, row, shape):
+    return os.path.join(output_dir, f"{row:06d}_{shape.lower()}.png")
+
+
+def render_chunk(renderer, jobs, output_dir):
+    """Снимки блока заданий (номер, фигура, параметры или текст ошибки); возвращает ошибки"""
+    errors = []
+    for row, shape, params in jobs:
+        try:
+            if isinstance(params, str):
+                raise ValueError(params)
+            renderer.render(shape, params, snapshot_path(output_dir, row, shape))
+        except ValueError as e:
+            errors.append((row, shape, str(e.args[0])))
+    return errors
+
+
+_RENDERER = None
+
+
+def _init_worker(size):
+    global _RENDERER
+    _RENDERER = SnapshotRenderer(size)
+
+
+def _render_in_worker(jobs, output_dir):
+    return render_chunk(_RENDERER, jobs, output_dir)
+
+
+def peak_memory(who):
+    """Пиковая память в байтах по getrusage: ru_maxrss в macOS - в байтах, в Linux - в килобайтах"""
+    maxrss = resource.getrusage(who).ru_maxrss
+    return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+
+class SnapshotReport:
+    """Итог серии снимков: число, ошибки, время и пиковая память"""
+
+    def __init__(self, total, errors, elapsed, workers=1):
+        self.total = total
+        self.errors = errors
+        self.elapsed = elapsed
+        self.peak_memory = peak_memory(resource.RUSAGE_SELF) if resource else 0
+        # для процессов пула - максимум по одному процессу
+        self.peak_worker_memory = peak_memory(resource.RUSAGE_CHILDREN) if resource and workers > 1 else 0
+
+    @property
+    def images(self):
+        return self.total - len(self.errors)
+
+    @property
+    def rate(self):
+        return self.images / max(self.elapsed, 1e-9)
+
+    def summary(self):
+        text = (f"Готово: {self.images} снимков за {self.elapsed:.2f} с ({self.rate:.1f} снимков/с), "
+                f"ошибок {len(self.errors)}")
+        if self.peak_memory:
+            text += f", пиковая память {self.peak_memory / 2 ** 20:.0f} МБ"
+        if self.peak_worker_memory:
+            text += f", в процессе пула до {self.peak_worker_memory / 2 ** 20:.0f} МБ"
+        return text
+
+
+def render_jobs(jobs, output_dir, size=DEFAULT_SIZE, workers=1, chunk_size=DEFAULT_CHUNK_SIZE, log=None):
+    """Снимки потока заданий (номер, фигура, параметры) в output_dir; возвращает SnapshotReport"""
+    os.makedirs(output_dir, exist_ok=True)
+    jobs = iter(jobs)
+    chunks = iter(lambda: list(itertools.islice(jobs, chunk_size)), [])
+    total = 0
+    errors = []
+    started = time.perf_counter()
+
+    def progress(chunk, chunk_errors):
+        nonlocal total
+        total += len(chunk)
+        errors.extend(chunk_errors)
+        if log is not None:
+            print(f"{total} снимков, {total / (time.perf_counter() - started):.1f} снимков/с", file=log)
+
+    if workers <= 1:
+        renderer = SnapshotRenderer(size)
+        try:
+            for chunk in chunks:
+                progress(chunk, render_chunk(renderer, chunk, output_dir))
+        finally:
+            renderer.close()
+    else:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(size,)) as executor:
+            # в работе не больше двух блоков на процесс, чтобы не читать все задания заранее
+            pending = []
+            for chunk in chunks:
+                pending.append((chunk, executor.submit(_render_in_worker, chunk, output_dir)))
+                if len(pending) >= 2 * workers:
+                    chunk, future = pending.pop(0)
+                    progress(chunk, future.result())
+            for chunk, future in pending:
+                progress(chunk, future.result())
+    return SnapshotReport(total, errors, time.perf_counter() - started, workers)
+
+
+def read_jobs(path):
+    """Задания из CSV или Parquet в формате пакетного режима: столбец shape и параметры"""
+    for chunk in read_chunks(path):
+        for i, shape in enumerate(chunk.shapes):
+            row = chunk.start + i
+            if chunk.parse_errors[i]:
+                yield row, shape, NUMBER_ERROR
+            elif shape not in SNAPSHOT_SHAPES:
+                yield row, shape, f"Нет снимка для фигуры: {shape}"
+            else:
+                yield row, shape, {name: float(chunk.params[name][i]) for name in param_names(shape)}
+
+
+def main(argv=None):
+    """Разбор аргументов командной строки режима снимков"""
+    parser = argparse.ArgumentParser(prog="main.py snapshots", description="Снимки объёмных фигур в PNG")
+    parser.add_argument("input", help="входной файл .csv или .parquet")
+    parser.add_argument("output", help="каталог для файлов PNG")
+    parser.add_argument("--size", type=int, nargs=2, default=DEFAULT_SIZE, metavar=("W", "H"))
+    parser.add_argument("--workers", type=int, default=1, help="число процессов")
+    args = parser.parse_args(argv)
+    report = render_jobs(read_jobs(args.input), args.output, tuple(args.size), args.workers, log=sys.stderr)
+    for row, shape, message in report.errors:
+        print(f"строка {row} ({shape}): {message}", file=sys.stderr)
+    print(report.summary(), file=sys.stderr)
+    return 0
@@ -0,0 +1,123 @@
+"""Пространственный индекс прямоугольников на равномерной сетке.
+
+Индекс строится сразу по массиву ограничивающих прямоугольников
+(xmin, ymin, xmax, ymax). Ячейки сетки хранятся в сжатом виде: номера
+объектов отсортированы по номеру ячейки, и для каждой ячейки известно
+начало её диапазона, поэтому строка ячеек запроса - это один срез массива.
+Объекты могут иметь собственные номера ids; запросы возвращают их.
+"""
+import numpy as np
+
+
+def normalized(xmin, ymin, xmax, ymax):
+    """Прямоугольник запроса с упорядоченными углами: рамка выделения может тянуться в любую сторону"""
+    return min(xmin, xmax), min(ymin, ymax), max(xmin, xmax), max(ymin, ymax)
+
+
+class GridIndex:
+    """Статический индекс ограничивающих прямоугольников на равномерной сетке"""
+
+    def __init__(self, bboxes, cell_size=None, ids=None):
+        self.bboxes = np.asarray(bboxes, dtype=np.float64).reshape(-1, 4)
+        n = len(self.bboxes)
+        self.ids = np.arange(n) if ids is None else np.asarray(ids, dtype=np.int64)
+        if n:
+            self.origin = self.bboxes[:, :2].min(axis=0)
+            extent = self.bboxes[:, 2:].max(axis=0) - self.origin
+        else:
+            self.origin = np.zeros(2)
+            extent = np.ones(2)
+        if cell_size is None:
+            cell_size = self.default_cell_size(self.bboxes, extent)
+        self.cell_size = float(cell_size)
+        self.shape = np.maximum(np.ceil(extent / self.cell_size).astype(np.int64), 1)
+        self._build()
+
+    @staticmethod
+    def default_cell_size(bboxes, extent):
+        """Размер ячейки: около двух средних размеров объекта, но не больше ~n ячеек"""
+        n = max(len(bboxes), 1)
+        size = 2 * np.mean(bboxes[:, 2:] - bboxes[:, :2]) if len(bboxes) else 1.0
+        by_count = np.sqrt(max(extent[0] * extent[1], 1e-12) / n)
+        return max(size, by_count, 1e-9)
+
+    def _cells(self, xmin, ymin, xmax, ymax):
+        """Диапазоны ячеек сетки для прямоугольников"""
+        nx, ny = self.shape
+        cx0 = np.clip(((xmin - self.origin[0]) // self.cell_size).astype(np.int64), 0, nx - 1)
+        cy0 = np.clip(((ymin - self.origin[1]) // self.cell_size).astype(np.int64), 0, ny - 1)
+        cx1 = np.clip(((xmax - self.origin[0]) // self.cell_size).astype(np.int64), 0, nx - 1)
+        cy1 = np.clip(((ymax - self.origin[1]) // self.cell_size).astype(np.int64), 0, ny - 1)
+        return cx0, cy0, cx1, cy1
+
+    def _build(self):
+        nx, ny = self.shape
+        b = self.bboxes
+        cx0, cy0, cx1, cy1 = self._cells(b[:, 0], b[:, 1], b[:, 2], b[:, 3])
+        w = cx1 - cx0 + 1
+        counts = w * (cy1 - cy0 + 1)
+        ids = np.repeat(np.arange(len(b)), counts)
+        # номер записи внутри прямоугольника ячеек объекта -> смещение ячейки
+        local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        ww = np.repeat(w, counts)
+        cells = (np.repeat(cy0, counts) + local // ww) * nx + np.repeat(cx0, counts) + local % ww
+        order = np.argsort(cells, kind="stable")
+        self.entries = ids[order]
+        self.starts = np.zeros(nx * ny + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cells, minlength=nx * ny), out=self.starts[1:])
+
+    def __len__(self):
+        return len(self.bboxes)
+
+    def _cell(self, value, axis):
+        cell = int((value - self.origin[axis]) // self.cell_size)
+        return min(max(cell, 0), self.shape[axis] - 1)
+
+    def candidates(self, xmin, ymin, xmax, ymax):
+        """Позиции объектов из ячеек, задетых прямоугольником (возможны лишние)"""
+        if not len(self.bboxes):
+            return np.empty(0, dtype=np.int64)
+        xmin, ymin, xmax, ymax = normalized(xmin, ymin, xmax, ymax)
+        nx = self.shape[0]
+        cx0, cx1 = self._cell(xmin, 0), self._cell(xmax, 0)
+        cy0, cy1 = self._cell(ymin, 1), self._cell(ymax, 1)
+        if cx0 == cx1 and cy0 == cy1:
+            # в одной ячейке каждый объект записан один раз
+            cell = cy0 * nx + cx0
+            return self.entries[self.starts[cell]:self.starts[cell + 1]]
+        parts = [self.entries[self.starts[cy * nx + cx0]:self.starts[cy * nx + cx1 + 1]]
+                 for cy in range(cy0, cy1 + 1)]
+        return np.unique(np.concatenate(parts))
+
+    def query(self, xmin, ymin, xmax, ymax):
+        """Номера объектов, чьи прямоугольники пересекают заданный"""
+        xmin, ymin, xmax, ymax = normalized(xmin, ymin, xmax, ymax)
+        positions = self.candidates(xmin, ymin, xmax, ymax)
+        b = self.bboxes[positions]
+        hit = (b[:, 0] <= xmax) & (b[:, 2] >= xmin) & (b[:, 1] <= ymax) & (b[:, 3] >= ymin)
+        return self.ids[positions[hit]]
+
+    def query_point(self, x, y):
+        """Номера объектов, чьи прямоугольники содержат точку"""
+        return self.query(x, y, x, y)
+
+    def pairs(self):
+        """Пары номеров (i, j) объектов с пересекающимися прямоугольниками, i < j"""
+        # внутри каждой ячейки позиция p образует пары со всеми следующими позициями ячейки
+        cell_sizes = np.diff(self.starts)
+        entry_cells = np.repeat(np.arange(len(cell_sizes)), cell_sizes)
+        positions = np.arange(len(self.entries))
+        partners = self.starts[1:][entry_cells] - positions - 1
+        first = np.repeat(positions, partners)
+        offsets = np.arange(partners.sum()) - np.repeat(np.cumsum(partners) - partners, partners)
+        a = self.entries[first]
+        b = self.entries[first + 1 + offsets]
+        ba, bb = self.bboxes[a], self.bboxes[b]
+        hit = (ba[:, 0] <= bb[:, 2]) & (ba[:, 2] >= bb[:, 0]) & (ba[:, 1] <= bb[:, 3]) & (ba[:, 3] >= bb[:, 1])
+        a, b, ba, bb, first = a[hit], b[hit], ba[hit], bb[hit], first[hit]
+        # пара из нескольких общих ячеек учитывается только в ячейке,
+        # где лежит нижний левый угол пересечения прямоугольников
+        cx, cy, _, _ = self._cells(np.maximum(ba[:, 0], bb[:, 0]), np.maximum(ba[:, 1], bb[:, 1]), 0, 0)
+        hit = cy * self.shape[0] + cx == entry_cells[first]
+        a, b = np.minimum(a[hit], b[hit]), np.maximum(a[hit], b[hit])
+        return np.column_stack([self.ids[a], self.ids[b]])
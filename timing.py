@@ -0,0 +1,85 @@
+"""Замеры времени этапов расчёта фигуры.
+
+Для каждой пары (фигура, этап) хранится скользящее окно последних замеров,
+по которому считаются перцентили и гистограмма. Этапы: "parse" - чтение
+полей ввода, "validate" - проверка параметров, "formula" - расчёт
+характеристик, "build" - построение сетки или геометрии элемента,
+"render" - вывод на сцену. Запись возможна из нескольких потоков.
+"""
+import json
+import time
+from collections import deque
+from contextlib import contextmanager
+from threading import Lock
+
+import numpy as np
+
+STAGES = ("parse", "validate", "formula", "build", "render")
+DEFAULT_WINDOW = 1000
+
+
+class Timings:
+    """Скользящие окна замеров по фигуре и этапу"""
+
+    def __init__(self, window=DEFAULT_WINDOW):
+        self.window = window
+        self.samples = {}
+        self.lock = Lock()
+
+    def record(self, shape, stage, seconds):
+        with self.lock:
+            samples = self.samples.get((shape, stage))
+            if samples is None:
+                samples = self.samples[(shape, stage)] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    @contextmanager
+    def measure(self, shape, stage):
+        """Замер времени блока with как этапа stage фигуры shape"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(shape, stage, time.perf_counter() - started)
+
+    def values(self, shape, stage):
+        with self.lock:
+            return np.array(self.samples.get((shape, stage), ()))
+
+    def histogram(self, shape, stage, bins=20):
+        """Гистограмма замеров на логарифмической шкале: (счётчики, границы в секундах)"""
+        values = self.values(shape, stage)
+        if not len(values):
+            return np.zeros(bins, dtype=np.int64), np.zeros(bins + 1)
+        low, high = max(values.min(), 1e-7), max(values.max(), 1e-7)
+        edges = np.geomspace(low, high * 1.0001, bins + 1)
+        return np.histogram(np.maximum(values, low), edges)
+
+    def summary(self):
+        """Число замеров, p50 и p95 в секундах для каждой фигуры и этапа"""
+        with self.lock:
+            keys = sorted(self.samples, key=lambda key: (key[0], STAGES.index(key[1])
+                                                         if key[1] in STAGES else len(STAGES)))
+        summary = {}
+        for shape, stage in keys:
+            values = self.values(shape, stage)
+            p50, p95 = np.percentile(values, [50, 95])
+            summary.setdefault(shape, {})[stage] = {"count": len(values), "p50": p50, "p95": p95}
+        return summary
+
+    def clear(self):
+        with self.lock:
+            self.samples.clear()
+
+    def export_json(self, path):
+        """Сводка и гистограммы в файл JSON"""
+        summary = self.summary()
+        for shape, stages in summary.items():
+            for stage, row in stages.items():
+                counts, edges = self.histogram(shape, stage)
+                row["histogram"] = {"counts": counts.tolist(), "edges": edges.tolist()}
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"window": self.window, "stages": summary}, f, indent=2)
+
+
+TIMINGS = Timings()
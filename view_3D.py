@@ -1,5 +1,52 @@
-from PySide6.QtWidgets import QWidget, QFrame, QVBoxLayout
+from PySide6.QtWidgets import QWidget, QFrame, QVBoxLayout, QHBoxLayout, QLabel, QSpinBox
+from PySide6.QtCore import QTimer
 from pyvistaqt import QtInteractor
+from vtkmodules.vtkRenderingCore import vtkActor
+from math import tan, radians, pi, dist
+
+from background import BackgroundRunner
+from bulk_3d import make_instances, make_glyph_mapper, set_glyph_colors, unit_mesh
+from mesh_cache import cached_mesh
+
+# ступени числа сегментов по окружности: разрешение меняется скачками, а не на каждый шаг зума
+SEGMENT_STEPS = (6, 8, 12, 16, 24, 32, 48, 64, 96, 128, 192, 256)
+
+
+def triangle_count(mesh):
+    """Число треугольников после триангуляции многоугольников сетки"""
+    polys = mesh.GetPolys()
+    return polys.GetNumberOfConnectivityIds() - 2 * polys.GetNumberOfCells()
+
+
+class LevelOfDetail:
+    """Выбор разрешения сферы, цилиндра и конуса по размеру на экране"""
+
+    def __init__(self, triangle_budget=100_000, pixels_per_segment=10):
+        self.triangle_budget = triangle_budget
+        self.pixels_per_segment = pixels_per_segment
+
+    @staticmethod
+    def triangles(kind, segments):
+        """Оценка числа треугольников сетки kind при заданном числе сегментов"""
+        if kind == "sphere":
+            return 2 * segments * (segments // 2 - 2)
+        if kind == "cylinder":
+            return 4 * segments - 4
+        return 2 * segments - 2
+
+    def segments(self, kind, radius_px):
+        """Число сегментов по окружности для радиуса radius_px в пикселях"""
+        wanted = 2 * pi * radius_px / self.pixels_per_segment
+        steps = [n for n in SEGMENT_STEPS if self.triangles(kind, n) <= self.triangle_budget] or SEGMENT_STEPS[:1]
+        return next((n for n in steps if n >= wanted), steps[-1])
+
+    def resolution(self, kind, radius_px):
+        """Параметры разрешения для построения сетки kind"""
+        n = self.segments(kind, radius_px)
+        if kind == "sphere":
+            return {"theta_resolution": n, "phi_resolution": max(n // 2, 4)}
+        return {"resolution": n}
+
 
 class View3D(QWidget):
     """ Обёртка для QtInteractor"""
@@ -9,11 +56,164 @@ class View3D(QWidget):
         layout = QVBoxLayout()
         self.plotter = QtInteractor(self.frame)
         layout.addWidget(self.plotter.interactor)
+        layout.addLayout(self.get_lod_layout())
         self.frame.setLayout(layout)
         self.setLayout(layout)
+        # постоянные актёры по типу фигуры и сетки, из которых они построены
+        self.actors = {}
+        self.sources = {}
+        self.items = []
+        # актёры массовой отрисовки по типу фигуры: все экземпляры типа рисует один актёр
+        self.instances = {}
+        # фигура с адаптивным разрешением; пересчитывается после изменения камеры
+        self.lod = LevelOfDetail(self.budget_edit.value())
+        self.lod_shape = None
+        self.runner = BackgroundRunner(workers=1, parent=self)
+        self.lod_timer = QTimer(self)
+        self.lod_timer.setSingleShot(True)
+        self.lod_timer.setInterval(100)
+        self.lod_timer.timeout.connect(self.update_lod)
+        self.plotter.camera.AddObserver("ModifiedEvent", lambda *args: self.lod_timer.start())
+
+    def get_lod_layout(self):
+        """Настройка бюджета треугольников и счётчик треугольников"""
+        h_layout = QHBoxLayout()
+        h_layout.addWidget(QLabel("Бюджет треугольников:"))
+        self.budget_edit = QSpinBox()
+        self.budget_edit.setRange(100, 10_000_000)
+        self.budget_edit.setSingleStep(10_000)
+        self.budget_edit.setValue(100_000)
+        self.budget_edit.valueChanged.connect(self.set_triangle_budget)
+        h_layout.addWidget(self.budget_edit)
+        self.triangles_label = QLabel()
+        h_layout.addWidget(self.triangles_label)
+        h_layout.addStretch()
+        return h_layout
+
+    def set_triangle_budget(self, budget):
+        self.lod.triangle_budget = budget
+        self.update_lod()
+
+    def triangle_count(self):
+        """Число треугольников видимых фигур"""
+        actors = [a for a in self.actors.values() if a.GetVisibility()] + self.items
+        count = sum(triangle_count(actor.GetMapper().GetInput()) for actor in actors)
+        for actor in self.instances.values():
+            if actor.GetVisibility():
+                mapper = actor.GetMapper()
+                count += triangle_count(mapper.GetSource()) * mapper.GetInput().GetNumberOfPoints()
+        return count
+
+    def update_triangle_count(self):
+        self.triangles_label.setText(f"Треугольников: {self.triangle_count()}")
 
     def clear(self):
-        self.plotter.clear()
+        """Скрытие постоянных актёров и удаление добавленных через addItem"""
+        for actor in self.items:
+            self.plotter.remove_actor(actor, render=False)
+        self.items = []
+        for actor in list(self.actors.values()) + list(self.instances.values()):
+            actor.SetVisibility(False)
+        self.lod_shape = None
+        self.update_triangle_count()
+        self.plotter.render()
 
     def addItem(self, data, *args, **kwargs):
-        self.plotter.add_mesh(data, *args, **kwargs)
\ No newline at end of file
+        actor = self.plotter.add_mesh(data, *args, **kwargs)
+        self.items.append(actor)
+        self.update_triangle_count()
+        return actor
+
+    def show_mesh(self, key, mesh, scale=(1, 1, 1), reset_camera=True, copy=True, **kwargs):
+        """Показ фигуры key: актёр создаётся один раз, затем обновляются его точки и масштаб.
+
+        copy=False - актёр рисует сам объект mesh без копирования; подходит
+        для сеток, которые не лежат в общем кэше и не будут изменяться.
+        """
+        actor = self.actors.get(key)
+        if actor is None:
+            actor = self.plotter.add_mesh(mesh.copy() if copy else mesh, render=False, **kwargs)
+            self.actors[key] = actor
+        elif not copy:
+            actor.GetMapper().SetInputData(mesh)
+        elif self.sources[key] is not mesh:
+            # обычные вызовы VTK: mapper.dataset появился только в новых версиях pyvista
+            dataset = actor.GetMapper().GetInput()
+            if dataset.GetNumberOfPoints() == mesh.n_points and dataset.GetNumberOfCells() == mesh.n_cells:
+                dataset.GetPoints().DeepCopy(mesh.GetPoints())
+                dataset.Modified()
+            else:
+                dataset.DeepCopy(mesh)
+        self.sources[key] = mesh
+        actor.SetScale(scale)
+        for other in self.actors.values():
+            other.SetVisibility(other is actor)
+        if reset_camera:
+            self.plotter.reset_camera(render=False)
+        self.update_triangle_count()
+        self.plotter.render()
+        return actor
+
+    def show_instances(self, shape, positions, colors=None, segments=8, reset_camera=True, **params):
+        """Показ множества фигур shape одним актёром.
+
+        positions - центры (n, 3), params - массивы параметров фигуры,
+        colors - RGB (n, 3) или скаляры (n,) для палитры. Актёр создаётся один
+        раз на тип фигуры, дальше у него заменяются точки и сетка экземпляра.
+        """
+        instances = make_instances(shape, positions, colors, **params)
+        source = unit_mesh(shape, segments)
+        actor = self.instances.get(shape)
+        if actor is None:
+            actor = vtkActor()
+            actor.SetMapper(make_glyph_mapper(source, instances))
+            self.plotter.add_actor(actor, reset_camera=False, render=False)
+            self.instances[shape] = actor
+        else:
+            mapper = actor.GetMapper()
+            mapper.SetSourceData(source)
+            mapper.SetInputData(instances)
+            set_glyph_colors(mapper, instances)
+        actor.SetVisibility(True)
+        if reset_camera:
+            self.plotter.reset_camera(render=False)
+        self.update_triangle_count()
+        self.plotter.render()
+        return actor
+
+    def projected_radius(self, radius):
+        """Радиус в пикселях для сферы радиуса radius в начале координат"""
+        camera = self.plotter.camera
+        height = max(self.plotter.interactor.height(), 1)
+        if camera.parallel_projection:
+            return radius / camera.parallel_scale * height / 2
+        distance = max(dist(camera.position, (0, 0, 0)), radius)
+        return radius / (distance * tan(radians(camera.view_angle) / 2)) * height / 2
+
+    def lod_resolution(self, kind, radius):
+        """Разрешение сетки kind по текущему размеру на экране"""
+        return self.lod.resolution(kind, self.projected_radius(radius))
+
+    def show_lod(self, key, kind, radius, params, scale=(1, 1, 1), mesh=None, **kwargs):
+        """Показ фигуры с адаптивным разрешением; radius - радиус описанной сферы"""
+        if mesh is None:
+            mesh = cached_mesh(kind, **params, **self.lod_resolution(kind, radius))
+        self.lod_shape = (key, kind, radius, params, scale, kwargs)
+        actor = self.show_mesh(key, mesh, scale, **kwargs)
+        # после сброса камеры размер на экране известен точно
+        self.update_lod()
+        return actor
+
+    def update_lod(self):
+        """Смена разрешения текущей фигуры после зума или смены бюджета; сетка строится в фоне"""
+        shape = self.lod_shape
+        if shape is None:
+            return
+        key, kind, radius, params, scale, kwargs = shape
+        resolution = self.lod_resolution(kind, radius)
+
+        def swap(mesh):
+            if self.lod_shape is shape and mesh is not self.sources.get(key):
+                self.show_mesh(key, mesh, scale, reset_camera=False, **kwargs)
+
+        self.runner.submit("lod", lambda token: cached_mesh(kind, **params, **resolution), swap)